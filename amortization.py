@@ -0,0 +1,99 @@
+import math
+
+import numpy as np
+
+# Loan repayment math shared by the pages and batch scoring. Every function accepts scalars
+# or arrays (broadcast against each other) and returns a float for all-scalar inputs.
+#
+# Edge cases: a zero interest rate repays the principal in equal instalments, and a tenure
+# under one month means the whole amount is due as a single payment with no interest.
+
+# EMI above this percentage of income is flagged as unaffordable
+AFFORDABILITY_LIMIT = 40
+
+SCALAR_TYPES = (int, float, np.integer, np.floating)
+
+
+def _result(value):
+    return float(value) if np.ndim(value) == 0 else value
+
+
+def _scalar_emi(loan_amount, interest_rate, loan_tenure_months):
+    # Plain-float path for the pages' single loan; same formula as the array path below
+    if loan_tenure_months < 1:
+        return float(loan_amount)
+    monthly_rate = interest_rate / (12 * 100)
+    if monthly_rate > 0:
+        growth_minus_one = math.expm1(loan_tenure_months * math.log1p(monthly_rate))
+        return loan_amount * monthly_rate * (growth_minus_one + 1) / growth_minus_one
+    return loan_amount / loan_tenure_months
+
+
+def calculate_emi(loan_amount, interest_rate, loan_tenure_months):
+    # Monthly payment (EMI) for an annual interest rate in percent
+    if isinstance(loan_amount, SCALAR_TYPES) and isinstance(interest_rate, SCALAR_TYPES) \
+            and isinstance(loan_tenure_months, SCALAR_TYPES):
+        return float(_scalar_emi(loan_amount, interest_rate, loan_tenure_months))
+
+    loan_amount, monthly_rate, months = np.broadcast_arrays(
+        np.asarray(loan_amount, dtype=float), np.asarray(interest_rate, dtype=float) / (12 * 100),
+        np.asarray(loan_tenure_months, dtype=float))
+    instalments = np.maximum(months, 1)
+
+    # growth - 1 computed as expm1(n * log1p(r)) stays accurate for tiny rates
+    growth_minus_one = np.expm1(instalments * np.log1p(monthly_rate))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        emi = np.where(monthly_rate > 0,
+                       loan_amount * monthly_rate * (growth_minus_one + 1) / growth_minus_one,
+                       loan_amount / instalments)
+    return _result(np.where(months < 1, loan_amount, emi))
+
+
+def total_interest(loan_amount, interest_rate, loan_tenure_months):
+    # Interest paid over the life of the loan
+    months = np.maximum(np.asarray(loan_tenure_months, dtype=float), 1)
+    return _result(np.asarray(calculate_emi(loan_amount, interest_rate, loan_tenure_months)) * months
+                   - np.asarray(loan_amount, dtype=float))
+
+
+def affordability(emi, income):
+    # EMI over a year as a percentage of (annual) income; 0 where income isn't positive
+    emi, income = np.broadcast_arrays(np.asarray(emi, dtype=float), np.asarray(income, dtype=float))
+    percentage = np.divide(emi * 12 * 100, income, out=np.zeros(emi.shape), where=income > 0)
+    return _result(percentage)
+
+
+def amortization_schedule(loan_amount, interest_rate, loan_tenure_months):
+    # Month-by-month schedule for one or many loans. Returns a dict of 2-D arrays shaped
+    # (n_loans, longest tenure): 'payment', 'interest', 'principal' and 'balance' (after
+    # the payment). Months past a loan's tenure are zero.
+    loan_amount, interest_rate, months = (a.ravel() for a in np.broadcast_arrays(
+        np.asarray(loan_amount, dtype=float), np.asarray(interest_rate, dtype=float),
+        np.asarray(loan_tenure_months, dtype=int)))
+    emi = np.atleast_1d(calculate_emi(loan_amount, interest_rate, months))[:, None]
+
+    # A single payment with no interest for tenures under a month
+    monthly_rate = np.where(months < 1, 0.0, interest_rate / (12 * 100))
+    months = np.maximum(months, 1)
+
+    month = np.arange(1, int(months.max(initial=1)) + 1)[None, :]
+    rate = monthly_rate[:, None]
+    principal0 = loan_amount[:, None]
+
+    # Closed-form balance after k payments, B_k = P(1+r)^k - EMI((1+r)^k - 1)/r, or P - k*EMI at r = 0
+    def balance_after(k):
+        growth_minus_one = np.expm1(k * np.log1p(rate))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            paid = np.where(rate > 0, emi * growth_minus_one / rate, emi * k)
+        return principal0 * (growth_minus_one + 1) - paid
+
+    active = month <= months[:, None]
+    # The last payment clears any rounding residue in the balance
+    last = month == months[:, None]
+    balance = np.where(active & ~last, balance_after(month), 0.0)
+    opening = np.where(active, balance_after(month - 1), 0.0)
+    interest = opening * rate
+    payment = np.where(last, opening + interest, np.where(active, emi, 0.0))
+    principal = payment - interest
+
+    return {'payment': payment, 'interest': interest, 'principal': principal, 'balance': balance}
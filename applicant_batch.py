@@ -0,0 +1,110 @@
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+# Raw applicant inputs, in the same order as the predict() arguments
+INPUT_COLUMNS = ['age', 'income', 'loan_amount', 'loan_tenure_months', 'avg_dpd_per_delinquency',
+                 'delinquency_ratio', 'credit_utilization_ratio', 'num_open_accounts',
+                 'residence_type', 'loan_purpose', 'loan_type']
+
+# Valid (min, max) for numeric inputs and options for categorical inputs,
+# shared by the widgets in main.py and the scoring service
+INPUT_LIMITS = {
+    'age': (18, 100),
+    'income': (0, None),
+    'loan_amount': (0, None),
+    'loan_tenure_months': (0, None),
+    'avg_dpd_per_delinquency': (0, None),
+    'delinquency_ratio': (0, 100),
+    'credit_utilization_ratio': (0, 100),
+    'num_open_accounts': (1, 4),
+}
+INPUT_CHOICES = {
+    'residence_type': ['Owned', 'Rented', 'Mortgage'],
+    'loan_purpose': ['Education', 'Home', 'Auto', 'Personal'],
+    'loan_type': ['Unsecured', 'Secured'],
+}
+
+# Storage type per numeric input. All float64: the scalar predict() path computes in
+# double precision, and narrower storage makes batch scores drift from it (float32
+# fractional inputs shift PDs by ~1e-7, enough to flip an integer credit score).
+NUMERIC_DTYPES = {name: np.float64 for name in INPUT_LIMITS}
+
+
+def encode_categories(name, values):
+    # Map labels to int8 codes into INPUT_CHOICES[name]; unknown labels are an error
+    choices = INPUT_CHOICES[name]
+    codes = pd.Categorical(np.asarray(values, dtype=object).ravel(), categories=choices).codes
+    if (codes < 0).any():
+        unknown = sorted({str(v) for v in pd.unique(np.asarray(values, dtype=object).ravel()[codes < 0])})
+        raise ValueError(f"Unknown {name} {unknown}; expected one of {choices}")
+    return codes.astype(np.int8)
+
+
+@dataclass(frozen=True)
+class ApplicantBatch:
+    # Column-oriented applicant inputs: one typed array per predict() argument, with
+    # categoricals stored as int8 codes into INPUT_CHOICES. 67 bytes per applicant.
+    age: np.ndarray
+    income: np.ndarray
+    loan_amount: np.ndarray
+    loan_tenure_months: np.ndarray
+    avg_dpd_per_delinquency: np.ndarray
+    delinquency_ratio: np.ndarray
+    credit_utilization_ratio: np.ndarray
+    num_open_accounts: np.ndarray
+    residence_type: np.ndarray
+    loan_purpose: np.ndarray
+    loan_type: np.ndarray
+
+    @classmethod
+    def from_columns(cls, data):
+        # Build from a DataFrame, a mapping of column arrays keyed by INPUT_COLUMNS, or another batch
+        if isinstance(data, cls):
+            return data
+        columns = {}
+        for name in INPUT_COLUMNS:
+            if name in INPUT_CHOICES:
+                columns[name] = encode_categories(name, data[name])
+            else:
+                columns[name] = np.asarray(data[name], dtype=NUMERIC_DTYPES[name]).ravel()
+        return cls(**columns)
+
+    @classmethod
+    def from_scalars(cls, age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+                     delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+                     residence_type, loan_purpose, loan_type):
+        # A batch of one, from the same arguments as predict()
+        values = (age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+                  delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+                  residence_type, loan_purpose, loan_type)
+        return cls.from_columns({name: [value] for name, value in zip(INPUT_COLUMNS, values)})
+
+    def __len__(self):
+        return len(self.age)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, f.name).nbytes for f in fields(self))
+
+    @property
+    def loan_to_income(self):
+        return np.divide(self.loan_amount, self.income, out=np.zeros(len(self)), where=self.income > 0)
+
+    def labels(self, name):
+        # Category strings for a categorical column
+        return np.asarray(INPUT_CHOICES[name], dtype=object)[getattr(self, name)]
+
+    def row(self, i=0):
+        # One applicant as plain Python values, in predict() argument order
+        return tuple(str(INPUT_CHOICES[name][getattr(self, name)[i]]) if name in INPUT_CHOICES
+                     else getattr(self, name)[i].item() for name in INPUT_COLUMNS)
+
+    def columns(self):
+        # {name: array} with categoricals decoded to labels, e.g. for building a DataFrame
+        return {name: self.labels(name) if name in INPUT_CHOICES else getattr(self, name)
+                for name in INPUT_COLUMNS}
+
+    def slice(self, start, stop):
+        return ApplicantBatch(**{f.name: getattr(self, f.name)[start:stop] for f in fields(self)})
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from predict_batch_benchmark import make_portfolio  # noqa: E402
+
+
+async def worker(client, path, payloads, latencies, errors):
+    for payload in payloads:
+        start = time.perf_counter()
+        response = await client.post(path, json=payload)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def run(client, path, payloads, concurrency):
+    latencies, errors = [], []
+    shards = [payloads[i::concurrency] for i in range(concurrency)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client, path, shard, latencies, errors) for shard in shards))
+    elapsed = time.perf_counter() - start
+
+    return np.array(latencies), errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the scoring service and report latency percentiles')
+    parser.add_argument('--url', default=None,
+                        help='base URL of a running service, e.g. http://localhost:8000 (default: in-process)')
+    parser.add_argument('--requests', type=int, default=2000, help='number of requests to send')
+    parser.add_argument('--concurrency', type=int, default=16, help='number of concurrent clients')
+    parser.add_argument('--batch-size', type=int, default=0,
+                        help='applications per request; 0 sends single requests to /score')
+    args = parser.parse_args()
+
+    rows = make_portfolio(args.requests * max(args.batch_size, 1)).to_dict(orient='records')
+    if args.batch_size:
+        path = '/score/batch'
+        payloads = [rows[i:i + args.batch_size] for i in range(0, len(rows), args.batch_size)]
+    else:
+        path = '/score'
+        payloads = rows
+
+    async def go():
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        else:
+            # Score in-process through the ASGI app, without a network hop
+            from scoring_service import app
+            from model_registry import get_model_data
+            get_model_data()
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://test', timeout=60)
+        async with client:
+            return await run(client, path, payloads, args.concurrency)
+
+    latencies, errors, elapsed = asyncio.run(go())
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+    print(f"endpoint    : {path}")
+    print(f"requests    : {len(latencies):,} ({len(errors)} errors), concurrency {args.concurrency}")
+    print(f"throughput  : {len(latencies) / elapsed:,.0f} req/s"
+          + (f", {len(latencies) * args.batch_size / elapsed:,.0f} rows/s" if args.batch_size else ''))
+    print(f"latency p50 : {p50:.2f} ms")
+    print(f"latency p99 : {p99:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
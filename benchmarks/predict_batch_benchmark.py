@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prediction_helper import predict, predict_batch  # noqa: E402
+
+
+# Random applications covering the same ranges as the input widgets in main.py. With
+# fractional=True the numeric inputs (other than open accounts) aren't whole numbers.
+def make_portfolio(n_rows, seed=42, fractional=False):
+    rng = np.random.default_rng(seed)
+
+    def numbers(low, high):
+        # Whole numbers in [low, high), or two-decimal numbers in the same closed range
+        if fractional:
+            return rng.uniform(low, high - 1, n_rows).round(2)
+        return rng.integers(low, high, n_rows)
+
+    return pd.DataFrame({
+        'age': numbers(18, 101),
+        'income': numbers(100000, 10000000),
+        'loan_amount': numbers(0, 5000000),
+        'loan_tenure_months': numbers(6, 61),
+        'avg_dpd_per_delinquency': numbers(0, 61),
+        'delinquency_ratio': numbers(0, 101),
+        'credit_utilization_ratio': numbers(0, 101),
+        'num_open_accounts': rng.integers(1, 5, n_rows),
+        'residence_type': rng.choice(['Owned', 'Rented', 'Mortgage'], n_rows),
+        'loan_purpose': rng.choice(['Education', 'Home', 'Auto', 'Personal'], n_rows),
+        'loan_type': rng.choice(['Unsecured', 'Secured'], n_rows),
+    })
+
+
+def bench_loop(df):
+    start = time.perf_counter()
+    for row in df.itertuples(index=False):
+        predict(*row)
+    return time.perf_counter() - start
+
+
+def bench_batch(df):
+    start = time.perf_counter()
+    predict_batch(df)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare predict() in a loop with predict_batch()')
+    parser.add_argument('--loop-rows', type=int, default=1000, help='rows scored one at a time with predict()')
+    parser.add_argument('--batch-rows', type=int, default=100000, help='rows scored with predict_batch()')
+    args = parser.parse_args()
+
+    loop_df = make_portfolio(args.loop_rows)
+    batch_df = make_portfolio(args.batch_rows)
+
+    # Sanity check: both paths must agree on the loop sample
+    probability, credit_score, rating = predict_batch(loop_df)
+    expected = [predict(*row) for row in loop_df.head(100).itertuples(index=False)]
+    assert np.allclose(probability[:100], [e[0] for e in expected])
+    assert list(credit_score[:100]) == [e[1] for e in expected]
+    assert list(rating[:100]) == [e[2] for e in expected]
+
+    loop_seconds = bench_loop(loop_df)
+    batch_seconds = bench_batch(batch_df)
+
+    loop_rate = args.loop_rows / loop_seconds
+    batch_rate = args.batch_rows / batch_seconds
+
+    print(f"predict loop   : {args.loop_rows:>10,} rows in {loop_seconds:8.3f}s  -> {loop_rate:>14,.0f} rows/s")
+    print(f"predict_batch  : {args.batch_rows:>10,} rows in {batch_seconds:8.3f}s  -> {batch_rate:>14,.0f} rows/s")
+    print(f"speedup        : {batch_rate / loop_rate:,.1f}x")
+
+
+if __name__ == '__main__':
+    main()
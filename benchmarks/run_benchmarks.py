@@ -0,0 +1,329 @@
+import os
+import gc
+import sys
+import json
+import time
+import itertools
+import argparse
+import platform
+import tracemalloc
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from amortization import affordability, calculate_emi  # noqa: E402
+from applicant_batch import ApplicantBatch  # noqa: E402
+from distribution_plots import create_kde_plot  # noqa: E402
+from model_registry import get_model_data  # noqa: E402
+from portfolio_loss import simulate_losses  # noqa: E402
+from predict_batch_benchmark import make_portfolio  # noqa: E402
+from prediction_helper import (calculate_credit_score, calculate_credit_scores, explain_batch,  # noqa: E402
+                               get_scorer, INPUT_CHOICES, INPUT_COLUMNS, predict, predict_batch, prepare_input, prepare_input_batch)
+from rating_path import cheapest_path, next_band_edge  # noqa: E402
+from ratings import RATING_EDGES  # noqa: E402
+from reason_codes import REASONS, REFERENCE_APPLICANT  # noqa: E402
+from reference_data import load_reference, reference_curves  # noqa: E402
+from score_table import get_score_table  # noqa: E402
+
+# Latency and peak-memory benchmarks for the scoring and rendering hot paths:
+#
+#   python benchmarks/run_benchmarks.py                   # run, write results.json, compare to baseline.json
+#   python benchmarks/run_benchmarks.py --save-baseline   # record a new baseline
+#   python benchmarks/run_benchmarks.py --threshold 0.5 --only predict
+#
+# Exits with status 1 if an equivalence check fails, or if any case is slower (or uses more
+# memory) than the baseline by more than --threshold.
+RESULTS_PATH = os.path.join(BENCH_DIR, 'results.json')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+APPLICANT = (28, 3000000, 2000000, 36, 20, 30, 30, 2, 'Owned', 'Education', 'Unsecured')
+# Scored 792 by predict_batch vs 791 by predict() when batch inputs were stored as float32
+FRACTIONAL_APPLICANT = (19.69, 6222404.57, 4639567.86, 12.39, 20.56, 78.74, 26.86, 3, 'Mortgage', 'Home', 'Unsecured')
+# The what-if page's slider grids, (min, max, step) per input
+PATH_DIMENSIONS = {
+    'credit_utilization_ratio': (0, 100, 5),
+    'delinquency_ratio': (0, 100, 5),
+    'avg_dpd_per_delinquency': (0, 60, 5),
+    'loan_amount': (0, 5000000, 100000),
+    'loan_tenure_months': (12, 60, 6),
+    'num_open_accounts': (1, 4, 1),
+}
+# Applicants whose cheapest path a local search around the continuous optimum missed
+PATH_APPLICANTS = [
+    (41, 1200000, 1900000, 48, 5, 55, 60, 1, 'Mortgage', 'Auto', 'Secured'),
+    (39, 1100000, 3300000, 12, 35, 10, 65, 3, 'Mortgage', 'Auto', 'Secured'),
+]
+
+
+def build_cases(max_batch):
+    # name -> zero-argument callable; setup happens here, outside the timed region
+    cases = {
+        'prepare_input': lambda: prepare_input(*APPLICANT),
+        'predict/single': lambda: predict(*APPLICANT),
+    }
+
+    # One what-if slider move: a single-input update and rescore
+    incremental = get_scorer().incremental(*APPLICANT)
+    utilization = itertools.cycle(range(0, 105, 5))
+    cases['predict/incremental'] = lambda: incremental.update('credit_utilization_ratio', next(utilization)).result()
+
+    input_df = prepare_input(*APPLICANT)
+    cases['calculate_credit_score'] = lambda: calculate_credit_score(input_df)
+
+    for size in (1, 100, 10000, 1000000):
+        if size > max_batch:
+            continue
+        portfolio = make_portfolio(size)
+        cases[f'predict_batch/{size}'] = lambda portfolio=portfolio: predict_batch(portfolio)
+        cases[f'explain_batch/{size}'] = lambda portfolio=portfolio: explain_batch(portfolio)
+
+    curves = reference_curves(*load_reference())
+    for feature, curve in curves.items():
+        marker = float(curve['grid'][len(curve['grid']) // 2])
+
+        def render(curve=curve, feature=feature, marker=marker):
+            plt.close(create_kde_plot(curve, feature, marker))
+        cases[f'create_kde_plot/{feature}'] = render
+
+    table = get_score_table()
+    cases['score_table/cutoff_for_pd'] = lambda: table.cutoff_for_pd(0.05)
+    probabilities = np.random.default_rng(0).uniform(0, 1, 10000)
+    cases['score_table/score_for_pd/10000'] = lambda: table.score_for_pd(probabilities)
+
+    cases['emi'] = lambda: calculate_emi(2000000, 12.0, 36)
+    if max_batch >= 1000000:
+        portfolio = make_portfolio(1000000)
+        amounts, tenures, incomes = (portfolio[name].to_numpy(dtype=float)
+                                     for name in ('loan_amount', 'loan_tenure_months', 'income'))
+        cases['affordability/1000000'] = lambda: affordability(calculate_emi(amounts, 12.0, tenures), incomes)
+
+    # One scenario chunk over 100k loans, independent and correlated defaults
+    if max_batch >= 100000:
+        rng = np.random.default_rng(0)
+        probability, exposure = rng.uniform(0, 0.1, 100000), rng.uniform(1e5, 5e6, 100000)
+        for correlation in (0.0, 0.12):
+            cases[f'portfolio_loss/100000x256/rho={correlation:g}'] = \
+                lambda correlation=correlation: simulate_losses(probability, exposure, 256, correlation, seed=0)
+
+    return cases
+
+
+def check_equivalence(n=10000):
+    # Returns a list of mismatches between the optimized scoring paths and the reference paths
+    failures = []
+    portfolio = make_portfolio(n)
+    model_data = get_model_data()
+    scaler = model_data['scaler']
+    scaled = [name for name in model_data['cols_to_scale'] if name in model_data['features']]
+    j = [list(model_data['cols_to_scale']).index(name) for name in scaled]
+
+    # Reduced scaler vs MinMaxScaler.transform on the full cols_to_scale frame
+    reduced = prepare_input_batch(portfolio)
+    batch = ApplicantBatch.from_columns(portfolio)
+    raw = pd.DataFrame(batch.columns()).rename(columns={'num_open_accounts': 'number_of_open_accounts'})
+    raw['loan_to_income'] = batch.loan_to_income
+    full = scaler.transform(raw.reindex(columns=list(model_data['cols_to_scale']), fill_value=1).astype(float))
+    if not np.array_equal(reduced[scaled].to_numpy(), full[:, j]):
+        failures.append('prepare_input_batch: reduced scaler differs from MinMaxScaler.transform')
+
+    # Compiled batch scorer vs the DataFrame path
+    probability, credit_score, rating = predict_batch(portfolio)
+    ref_probability, ref_credit_score, ref_rating = calculate_credit_scores(reduced)
+    if not (np.allclose(probability, ref_probability, rtol=0, atol=1e-12)
+            and np.array_equal(credit_score, ref_credit_score) and np.array_equal(rating, ref_rating)):
+        failures.append('predict_batch: differs from prepare_input_batch + calculate_credit_scores')
+
+    # Score <-> PD table reproduces the scores and brackets each PD
+    table = get_score_table()
+    row = credit_score - table.base_score
+    if not (np.array_equal(table.score_for_pd(probability), credit_score)
+            and np.all((table.min_pd[row] <= probability) & (probability <= table.max_pd[row]))):
+        failures.append('score_table: PD -> score lookup differs from predict_batch')
+
+    # Reason-code decomposition rebuilds the same scores
+    explained = explain_batch(portfolio)
+    if not (np.allclose(explained[0], probability, rtol=0, atol=1e-12)
+            and np.array_equal(explained[1], credit_score) and np.array_equal(explained[2], rating)):
+        failures.append('explain_batch: scores differ from predict_batch')
+
+    # Reasons stop at the top rating band, and a numeric reason's advice ("above the
+    # benchmark") holds for the applicant's own value
+    reasons = explained[3]
+    if (reasons[explained[1] >= RATING_EDGES[-2]] >= 0).any():
+        failures.append('explain_batch: reasons given for top-band applicants')
+    batch = ApplicantBatch.from_columns(portfolio)
+    for k, (code, attribute, _, _) in enumerate(REASONS):
+        if attribute not in INPUT_CHOICES:
+            values = getattr(batch, attribute)[(reasons == k).any(axis=1)]
+            if (values <= REFERENCE_APPLICANT[attribute]).any():
+                failures.append(f'explain_batch: {code} given at or below its reference value')
+
+    # Single-applicant paths
+    if predict(*APPLICANT)[1:] != calculate_credit_score(prepare_input(*APPLICANT))[1:]:
+        failures.append('predict: differs from prepare_input + calculate_credit_score')
+
+    # Batch paths vs scalar predict() on fractional inputs, which narrower-than-float64
+    # batch storage would round differently
+    fractional = pd.concat([pd.DataFrame([FRACTIONAL_APPLICANT], columns=INPUT_COLUMNS),
+                            make_portfolio(2000, fractional=True)], ignore_index=True)
+    expected = [predict(*row) for row in fractional[INPUT_COLUMNS].itertuples(index=False)]
+    expected_probability = np.array([result[0] for result in expected])
+    expected_score = np.array([result[1] for result in expected])
+    for name, scorer in (('predict_batch', predict_batch), ('explain_batch', explain_batch)):
+        result = scorer(fractional)
+        if not (np.allclose(result[0], expected_probability, rtol=0, atol=1e-12)
+                and np.array_equal(result[1], expected_score)):
+            failures.append(f'{name}: differs from predict() on fractional inputs')
+
+    # Incremental rescoring: walk one input at a time through the fractional rows, income
+    # included, for long enough to cross several RESYNC_UPDATES rebuilds
+    incremental = get_scorer().incremental(*APPLICANT)
+    steps = fractional[INPUT_COLUMNS].head(2000)
+    for i in range(len(steps)):
+        name = INPUT_COLUMNS[i % len(INPUT_COLUMNS)]
+        result = incremental.update(name, steps[name].iloc[i]).result()
+        expected = predict(*(incremental.inputs[column] for column in INPUT_COLUMNS))
+        if not (abs(result[0] - expected[0]) <= 1e-12 and result[1:] == expected[1:]):
+            failures.append(f'IncrementalScore: differs from predict() after updating {name} (step {i})')
+            break
+
+    # Cheapest combined path vs an exhaustive search of the slider grids. Every slider
+    # input raises the default risk, so only values at or below the current one can help.
+    for applicant in PATH_APPLICANTS:
+        inputs = dict(zip(INPUT_COLUMNS, applicant))
+        target = next_band_edge(predict(*applicant)[1])
+        path = cheapest_path(inputs, PATH_DIMENSIONS, target)
+        axes = [np.arange(low, inputs[name] + 1, step) for name, (low, _, step) in PATH_DIMENSIONS.items()]
+        grid = dict(zip(PATH_DIMENSIONS, (axis.ravel() for axis in np.meshgrid(*axes, indexing='ij'))))
+        n_points = len(grid['loan_amount'])
+        columns = {name: grid[name] if name in grid else np.full(n_points, inputs[name], dtype=object)
+                   for name in INPUT_COLUMNS}
+        reached = predict_batch(columns)[1] >= target
+        cost = sum(np.abs(grid[name] - inputs[name]) / (high - low)
+                   for name, (low, high, _) in PATH_DIMENSIONS.items())
+        path_cost = sum(abs(value - inputs[name]) / (PATH_DIMENSIONS[name][1] - PATH_DIMENSIONS[name][0])
+                        for name, value in (path or {}).items())
+        if path is None or not np.isclose(path_cost, cost[reached].min(), rtol=0, atol=1e-12):
+            failures.append(f'cheapest_path: not the cheapest change for {applicant}')
+
+    return failures
+
+
+def time_case(fn, min_time=0.2, repeats=5):
+    # Calibrate the loop count so each repeat takes at least min_time, then keep the best repeat
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    timings = [elapsed / number]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    timings.sort()
+    return {'seconds': timings[0], 'median_seconds': timings[len(timings) // 2], 'loops': number}
+
+
+def peak_memory(fn):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare(results, baseline, threshold, min_bytes=65536):
+    # Returns a list of human-readable regressions beyond threshold (a fraction, e.g. 0.25).
+    # Memory growth smaller than min_bytes is ignored as allocator noise.
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            if metric == 'peak_bytes' and result[metric] - base.get(metric, 0) < min_bytes:
+                continue
+            if base.get(metric) and result[metric] > base[metric] * (1 + threshold):
+                change = result[metric] / base[metric] - 1
+                regressions.append(f"{name}: {metric} {base[metric]:.3g} -> {result[metric]:.3g} (+{change:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scoring and rendering hot paths')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed slowdown / memory growth vs the baseline, as a fraction (default 0.25)')
+    parser.add_argument('--min-bytes', type=int, default=65536,
+                        help='ignore peak-memory growth smaller than this many bytes (default 64 KB)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline results file')
+    parser.add_argument('--output', default=RESULTS_PATH, help='where to write results')
+    parser.add_argument('--save-baseline', action='store_true', help='also write the results as the new baseline')
+    parser.add_argument('--max-batch', type=int, default=1000000, help='largest predict_batch size to run')
+    parser.add_argument('--only', default='', help='only run cases whose name contains this string')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per timing repeat')
+    args = parser.parse_args()
+
+    failures = check_equivalence()
+    if failures:
+        print(f"{len(failures)} equivalence check(s) failed:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+
+    cases = {name: fn for name, fn in build_cases(args.max_batch).items() if args.only in name}
+
+    results = {}
+    for name, fn in cases.items():
+        result = time_case(fn, args.min_time)
+        result['peak_bytes'] = peak_memory(fn)
+        results[name] = result
+        print(f"{name:<42} {result['seconds'] * 1e6:>14,.1f} us   peak {result['peak_bytes'] / 1024:>12,.1f} KB")
+
+    report = {
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor()},
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.threshold, args.min_bytes)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import numpy as np
+
+from applicant_batch import ApplicantBatch, INPUT_CHOICES, encode_categories
+
+
+class CategoryEncoder:
+    # One-hot encoding of the categorical inputs into the model's feature columns.
+    # The artifact's features list is read once: each label of each categorical input
+    # maps to the index of its '<input>_<label>' column, or -1 for the dropped baseline
+    # level (e.g. 'Mortgage', 'Auto', 'Secured'). Codes are the same int8 codes ApplicantBatch
+    # stores, and labels not in INPUT_CHOICES are an error.
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.choices = INPUT_CHOICES
+        index = {feature: i for i, feature in enumerate(self.features)}
+
+        # name -> array of feature indices, one per label code
+        self.columns = {}
+        # name -> {label: code}, for scalar lookups
+        self.codes = {}
+        for name, labels in self.choices.items():
+            self.columns[name] = np.array([index.get(f'{name}_{label}', -1) for label in labels], dtype=np.intp)
+            self.codes[name] = {label: code for code, label in enumerate(labels)}
+
+            # A dummy column the encoder can't produce means the artifact and INPUT_CHOICES disagree
+            known = {f'{name}_{label}' for label in labels}
+            unknown = [feature for feature in self.features if feature.startswith(f'{name}_') and feature not in known]
+            if unknown:
+                raise ValueError(f"Model features {unknown} have no matching {name} option in {labels}")
+
+        # Every one-hot column, in feature order
+        self.dummy_columns = sorted(int(i) for columns in self.columns.values() for i in columns if i >= 0)
+
+    def code(self, name, value):
+        # Code of one label into choices[name]
+        try:
+            return self.codes[name][value]
+        except KeyError:
+            raise ValueError(f"Unknown {name} {value!r}; expected one of {self.choices[name]}") from None
+
+    def dummies(self, name, value):
+        # {feature_name: 0 or 1} over every one-hot column of name, for a single label
+        hot = self.columns[name][self.code(name, value)]
+        return {self.features[i]: int(i == hot) for i in self.columns[name] if i >= 0}
+
+    def one_hot(self, data, n_rows=None):
+        # (n_rows, len(features)) float matrix with the one-hot columns of every categorical
+        # input set from data: an ApplicantBatch, or a mapping of label arrays or codes.
+        # Other columns are left at zero for the caller to fill.
+        encoded = {}
+        for name in self.choices:
+            values = np.asarray(getattr(data, name) if isinstance(data, ApplicantBatch) else data[name])
+            encoded[name] = values if values.dtype.kind in 'iu' else encode_categories(name, values)
+            if n_rows is None:
+                n_rows = len(encoded[name])
+
+        out = np.zeros((n_rows, len(self.features)))
+        rows = np.arange(n_rows)
+        for name, codes in encoded.items():
+            columns = self.columns[name][codes]
+            hot = columns >= 0
+            out[rows[hot], columns[hot]] = 1.0
+        return out
@@ -0,0 +1,58 @@
+import numpy as np
+
+# Class labels in the 'default' column and the names their curves are stored under
+CLASSES = {0: 'non_defaulters', 1: 'defaulters'}
+
+
+def kde_bandwidth(values):
+    # Scott's rule, as used by seaborn.kdeplot / scipy.stats.gaussian_kde
+    return np.std(values, ddof=1) * len(values) ** (-1 / 5)
+
+
+def kde_evaluate(values, grid, bandwidth, chunk_size=4096):
+    # Gaussian KDE of values evaluated at every grid point.
+    # Accumulates in chunks so large samples don't allocate a full grid x n matrix.
+    values = np.asarray(values, dtype=float)
+    density = np.zeros(len(grid))
+    for start in range(0, len(values), chunk_size):
+        z = (grid[:, None] - values[None, start:start + chunk_size]) / bandwidth
+        density += np.exp(-0.5 * z ** 2).sum(axis=1)
+    return density / (len(values) * bandwidth * np.sqrt(2 * np.pi))
+
+
+def density_curves(df, features, discrete_bins=None, target='default', gridsize=200, cut=3):
+    # Precompute per-class density curves for every feature on one shared grid.
+    # Returns {feature: {'grid': x, 'non_defaulters': y, 'defaulters': y}}. Features listed in
+    # discrete_bins also get 'bins' and '<class>_counts', with their KDEs scaled to counts.
+    discrete_bins = discrete_bins or {}
+    curves = {}
+
+    for feature in features:
+        samples = {}
+        for label, name in CLASSES.items():
+            values = df.loc[df[target] == label, feature].to_numpy(dtype=float)
+            samples[name] = values[np.isfinite(values)]
+        bandwidths = {name: kde_bandwidth(values) for name, values in samples.items()}
+
+        # One grid covering both classes' supports so the curves share an x axis;
+        # discrete features stay within the data range, like seaborn.histplot(kde=True)
+        feature_cut = 0 if feature in discrete_bins else cut
+        low = min(values.min() - feature_cut * bandwidths[name] for name, values in samples.items())
+        high = max(values.max() + feature_cut * bandwidths[name] for name, values in samples.items())
+        grid = np.linspace(low, high, gridsize)
+
+        curve = {'grid': grid}
+        for name, values in samples.items():
+            curve[name] = kde_evaluate(values, grid, bandwidths[name])
+
+        if feature in discrete_bins:
+            bins = np.asarray(discrete_bins[feature], dtype=float)
+            bin_width = np.diff(bins).mean()
+            curve['bins'] = bins
+            for name, values in samples.items():
+                curve[f'{name}_counts'] = np.histogram(values, bins=bins)[0]
+                curve[name] = curve[name] * len(values) * bin_width
+
+        curves[feature] = curve
+
+    return curves
@@ -0,0 +1,37 @@
+import matplotlib.pyplot as plt
+
+
+# Create the KDE plot for a feature from its precomputed curve
+# (see density.density_curves / reference_data.reference_curves)
+def create_kde_plot(curve, feature_name, current_value=None):
+    fig, ax = plt.subplots(figsize=(10, 6))
+
+    grid = curve['grid']
+
+    if 'bins' in curve:
+        # Discrete features: histogram of counts with a count-scaled KDE on top
+        bins = curve['bins']
+        ax.hist(bins[:-1], bins=bins, weights=curve['non_defaulters_counts'], color='blue', alpha=0.5,
+                label='Non-Defaulters', edgecolor='white')
+        ax.hist(bins[:-1], bins=bins, weights=curve['defaulters_counts'], color='orange', alpha=0.5,
+                label='Defaulters', edgecolor='white')
+        ax.plot(grid, curve['non_defaulters'], color='blue')
+        ax.plot(grid, curve['defaulters'], color='orange')
+    else:
+        ax.fill_between(grid, curve['non_defaulters'], color='blue', alpha=0.3, label='Non-Defaulters')
+        ax.plot(grid, curve['non_defaulters'], color='blue')
+        ax.fill_between(grid, curve['defaulters'], color='orange', alpha=0.3, label='Defaulters')
+        ax.plot(grid, curve['defaulters'], color='orange')
+
+    # Mark the current value if provided
+    if current_value is not None:
+        ax.axvline(x=current_value, color='red', linestyle='--', linewidth=2,
+                  label=f'Current Value: {current_value:.2f}')
+
+    ax.set_title(f'Distribution of {feature_name.replace("_", " ").title()}', fontsize=14)
+    ax.set_xlabel(feature_name.replace("_", " ").title(), fontsize=12)
+    ax.set_ylabel('Density', fontsize=12)
+    ax.legend()
+    plt.tight_layout()
+
+    return fig
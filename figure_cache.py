@@ -0,0 +1,66 @@
+import io
+import threading
+from collections import OrderedDict
+
+import matplotlib.pyplot as plt
+
+
+def marker_bucket(value, low, high, n_buckets=500):
+    # Snap a marker position to one of n_buckets steps across [low, high] so nearby
+    # values share one cached image; the snapped value is what gets drawn
+    if value is None:
+        return None
+    step = (high - low) / n_buckets
+    if step <= 0:
+        return float(value)
+    return float(round(value / step) * step)
+
+
+class FigureCache:
+    # Size-bounded LRU of rendered figure images (PNG or SVG bytes)
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render, fmt='png', dpi=100):
+        # Return the cached image for key, or call render() for a new figure, rasterize it,
+        # close it and cache the bytes
+        key = (key, fmt, dpi)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        fig = render()
+        try:
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, dpi=dpi)
+        finally:
+            plt.close(fig)
+        image = buffer.getvalue()
+
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = image
+                self._bytes += len(image)
+                while self._bytes > self.max_bytes and len(self._items) > 1:
+                    _, evicted = self._items.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._items), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
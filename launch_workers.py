@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+
+from model_registry import SHARED_MODEL_ENV
+from shared_model import SHARED_MODEL_PATH, export_from_artifacts, is_current
+
+# Start N Streamlit workers on consecutive ports, all mapping one read-only copy of the model:
+#
+#   python launch_workers.py --workers 4 --port 8501     # workers on 8501..8504
+#
+# Point the load balancer at the ports (with sticky sessions, since Streamlit sessions live
+# in one worker). The shared model file is exported first if it is missing or stale.
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+
+
+def start_worker(port, shared_path, extra_args):
+    env = dict(os.environ, **{SHARED_MODEL_ENV: shared_path})
+    command = [sys.executable, '-m', 'streamlit', 'run', APP_PATH,
+               '--server.port', str(port), '--server.headless', 'true', *extra_args]
+    return subprocess.Popen(command, env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Launch Streamlit workers sharing one memory-mapped model')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='number of workers (default: CPUs)')
+    parser.add_argument('--port', type=int, default=8501, help='port of the first worker')
+    parser.add_argument('--shared-model', default=SHARED_MODEL_PATH, help='shared model file')
+    parser.add_argument('--no-restart', action='store_true', help="don't restart workers that exit")
+    args, extra_args = parser.parse_known_args()
+
+    shared_path = os.path.abspath(args.shared_model)
+    if not is_current(shared_path):
+        size = export_from_artifacts(shared_path)
+        print(f"Exported {shared_path} ({size / 1024:.1f} KB)")
+
+    workers = {args.port + i: start_worker(args.port + i, shared_path, extra_args) for i in range(args.workers)}
+    print(f"Started {len(workers)} workers on ports {args.port}-{args.port + len(workers) - 1}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Supervise: restart workers that die until asked to stop, then stop them all
+    while not stopping and workers:
+        for port, process in list(workers.items()):
+            if process.poll() is not None:
+                print(f"Worker on port {port} exited with status {process.returncode}")
+                if args.no_restart:
+                    del workers[port]
+                else:
+                    workers[port] = start_worker(port, shared_path, extra_args)
+        time.sleep(1)
+
+    for process in workers.values():
+        process.terminate()
+    for process in workers.values():
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,11 @@
 import streamlit as st
-from prediction_helper import predict  # Ensure this is correctly linked to your prediction_helper.py
+from prediction_helper import predict, explain_batch, describe_reasons, ApplicantBatch, INPUT_LIMITS, INPUT_CHOICES  # Ensure this is correctly linked to your prediction_helper.py
+from amortization import AFFORDABILITY_LIMIT, affordability, calculate_emi
+from ratings import RATING_COLORS, UNDEFINED, rating_color
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-import joblib
 
 # Initialize session state for storing prediction results and input values
 if 'has_predicted' not in st.session_state:
@@ -87,26 +88,16 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# Load the training data for KDE plots and store in session state
-try:
-    if 'training_data' not in st.session_state:
-        model_data = joblib.load('artifacts/model_data.joblib')
-        st.session_state.training_data = model_data.get('training_data', None)
-    training_data = st.session_state.training_data
-except:
-    training_data = None
-    st.session_state.training_data = None
-
 # Create sections for different types of inputs
 st.markdown("<h4>Personal Information</h4>", unsafe_allow_html=True)
 row1 = st.columns(3)
 
 with row1[0]:
-    age = st.number_input('Age', min_value=18, step=1, max_value=100, value=28)
+    age = st.number_input('Age', min_value=INPUT_LIMITS['age'][0], step=1, max_value=INPUT_LIMITS['age'][1], value=28)
 with row1[1]:
-    income = st.number_input('YearlyIncome (LKR)', min_value=0, value=3000000)
+    income = st.number_input('YearlyIncome (LKR)', min_value=INPUT_LIMITS['income'][0], value=3000000)
 with row1[2]:
-    loan_amount = st.number_input('Loan Amount (LKR)', min_value=0, value=2000000)
+    loan_amount = st.number_input('Loan Amount (LKR)', min_value=INPUT_LIMITS['loan_amount'][0], value=2000000)
 
 st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
 st.markdown("<h4>Loan Details</h4>", unsafe_allow_html=True)
@@ -123,23 +114,18 @@ with row2[0]:
     """, unsafe_allow_html=True)
 
 with row2[1]:
-    loan_tenure_months = st.number_input('Loan Tenure (months)', min_value=0, step=1, value=36)
+    loan_tenure_months = st.number_input('Loan Tenure (months)', min_value=INPUT_LIMITS['loan_tenure_months'][0], step=1, value=36)
 with row2[2]:
-    avg_dpd_per_delinquency = st.number_input('Average Days Past Due', min_value=0, value=20)
+    avg_dpd_per_delinquency = st.number_input('Average Days Past Due', min_value=INPUT_LIMITS['avg_dpd_per_delinquency'][0], value=20)
 
 # Monthly Payment Calculator
 interest_rate = st.slider('Annual Interest Rate (%)', min_value=5.0, max_value=25.0, value=12.0, step=0.5)
 if loan_tenure_months > 0 and loan_amount > 0:
-    # Convert annual interest rate to monthly rate
-    monthly_rate = interest_rate / (12 * 100)
     # Calculate monthly payment (EMI)
-    if monthly_rate > 0:
-        emi = loan_amount * monthly_rate * (1 + monthly_rate)**loan_tenure_months / ((1 + monthly_rate)**loan_tenure_months - 1)
-    else:
-        emi = loan_amount / loan_tenure_months
+    emi = calculate_emi(loan_amount, interest_rate, loan_tenure_months)
     
     # Calculate what percentage of income this represents
-    income_percentage = (emi * 12 / income) * 100 if income > 0 else 0
+    income_percentage = affordability(emi, income)
     
     # Display the EMI and percentage of income
     st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
@@ -155,7 +141,7 @@ if loan_tenure_months > 0 and loan_amount > 0:
         st.markdown(f"""
             <div style='background-color: #f8f9fa; padding: 1rem; border-radius: 5px;'>
                 <p style='margin:0; color: #666;'>Percentage of Yearly Income</p>
-                <h3 style='margin:0; color: {"#ff4444" if income_percentage > 40 else "#00aa00"};'>{income_percentage:.2f}%</h3>
+                <h3 style='margin:0; color: {"#ff4444" if income_percentage > AFFORDABILITY_LIMIT else "#00aa00"};'>{income_percentage:.2f}%</h3>
             </div>
         """, unsafe_allow_html=True)
 
@@ -164,36 +150,28 @@ st.markdown("<h4>Credit Metrics</h4>", unsafe_allow_html=True)
 row3 = st.columns(3)
 
 with row3[0]:
-    delinquency_ratio = st.number_input('Delinquency Ratio (%)', min_value=0, max_value=100, step=1, value=30)
+    delinquency_ratio = st.number_input('Delinquency Ratio (%)', min_value=INPUT_LIMITS['delinquency_ratio'][0], max_value=INPUT_LIMITS['delinquency_ratio'][1], step=1, value=30)
 with row3[1]:
-    credit_utilization_ratio = st.number_input('Credit Utilization Ratio (%)', min_value=0, max_value=100, step=1, value=30)
+    credit_utilization_ratio = st.number_input('Credit Utilization Ratio (%)', min_value=INPUT_LIMITS['credit_utilization_ratio'][0], max_value=INPUT_LIMITS['credit_utilization_ratio'][1], step=1, value=30)
 with row3[2]:
-    num_open_accounts = st.number_input('Number of Open Loan Accounts', min_value=1, max_value=4, step=1, value=2)
+    num_open_accounts = st.number_input('Number of Open Loan Accounts', min_value=INPUT_LIMITS['num_open_accounts'][0], max_value=INPUT_LIMITS['num_open_accounts'][1], step=1, value=2)
 
 st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
 st.markdown("<h4>Additional Information</h4>", unsafe_allow_html=True)
 row4 = st.columns(3)
 
 with row4[0]:
-    residence_type = st.selectbox('Residence Type', ['Owned', 'Rented', 'Mortgage'])
+    residence_type = st.selectbox('Residence Type', INPUT_CHOICES['residence_type'])
 with row4[1]:
-    loan_purpose = st.selectbox('Loan Purpose', ['Education', 'Home', 'Auto', 'Personal'])
+    loan_purpose = st.selectbox('Loan Purpose', INPUT_CHOICES['loan_purpose'])
 with row4[2]:
-    loan_type = st.selectbox('Loan Type', ['Unsecured', 'Secured'])
+    loan_type = st.selectbox('Loan Type', INPUT_CHOICES['loan_type'])
 
 # Store all inputs in session state
-st.session_state.age = age
-st.session_state.income = income
-st.session_state.loan_amount = loan_amount
-st.session_state.loan_tenure_months = loan_tenure_months
-st.session_state.avg_dpd_per_delinquency = avg_dpd_per_delinquency
-st.session_state.loan_to_income_ratio = loan_to_income_ratio
-st.session_state.delinquency_ratio = delinquency_ratio
-st.session_state.credit_utilization_ratio = credit_utilization_ratio
-st.session_state.num_open_accounts = num_open_accounts
-st.session_state.residence_type = residence_type
-st.session_state.loan_purpose = loan_purpose
-st.session_state.loan_type = loan_type
+st.session_state.applicant = ApplicantBatch.from_scalars(age, income, loan_amount, loan_tenure_months,
+                                                        avg_dpd_per_delinquency, delinquency_ratio,
+                                                        credit_utilization_ratio, num_open_accounts,
+                                                        residence_type, loan_purpose, loan_type)
 st.session_state.interest_rate = interest_rate
 
 if 'income_percentage' in locals():
@@ -205,9 +183,9 @@ st.markdown("<br>", unsafe_allow_html=True)
 
 # Button to calculate risk
 if st.button('Calculate Risk'):
-    # Call the predict function from the helper module
-    probability, credit_score, rating = predict(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
-                                                delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+    probability, credit_score, rating = predict(age, income, loan_amount, loan_tenure_months,
+                                                avg_dpd_per_delinquency, delinquency_ratio,
+                                                credit_utilization_ratio, num_open_accounts,
                                                 residence_type, loan_purpose, loan_type)
     
     # Store results in session state
@@ -251,18 +229,7 @@ if st.session_state.has_predicted:
     # Credit Score with gauge-like visualization
     with col2:
         # Calculate color based on credit score
-        if credit_score >= 750:
-            color = "#00aa00"  # Green for excellent
-            bg_color = "#00ff0050"
-        elif credit_score >= 650:
-            color = "#88aa00"  # Yellow-green for good
-            bg_color = "#ffff0050"
-        elif credit_score >= 500:
-            color = "#ffaa00"  # Orange for average
-            bg_color = "#ffaa0050"
-        else:
-            color = "#ff4444"  # Red for poor
-            bg_color = "#ff666650"
+        color, bg_color = rating_color(credit_score)
             
         st.markdown(
             f"""
@@ -307,13 +274,7 @@ if st.session_state.has_predicted:
     # Rating with appropriate color coding
     with col3:
         # Determine color based on rating
-        rating_colors = {
-            'Excellent': ('#00aa00', '#00ff0050'),
-            'Good': ('#88aa00', '#ffff0050'),
-            'Average': ('#ffaa00', '#ffaa0050'),
-            'Poor': ('#ff4444', '#ff666650')
-        }
-        color, bg_color = rating_colors.get(rating, ('#000000', '#ffffff50'))
+        color, bg_color = RATING_COLORS.get(rating, RATING_COLORS[UNDEFINED])
         
         st.markdown(
             f"""
@@ -337,56 +298,20 @@ if st.session_state.has_predicted:
     # Risk Improvement Suggestions
     st.subheader("Risk Improvement Suggestions")
     
-    # Create suggestions based on the input values
+    # Suggestions come from the model's largest adverse reason codes for this applicant
+    applicant = st.session_state.applicant
+    reasons = explain_batch(applicant, top_n=4)[3]
     suggestions = []
-    
-    # Check loan to income ratio
-    if loan_to_income_ratio > 2.0:
-        suggestions.append("""
-            <div style='margin-bottom: 0.5rem;'>
-                <span style='color: #ff4444;'>●</span> <strong>High Loan-to-Income Ratio:</strong> Your loan amount is {:.1f}x your yearly income. 
-                Consider reducing your loan amount or increasing your income before applying.
-            </div>
-        """.format(loan_to_income_ratio))
-    
-    # Check credit utilization
-    if credit_utilization_ratio > 50:
-        suggestions.append("""
-            <div style='margin-bottom: 0.5rem;'>
-                <span style='color: #ff4444;'>●</span> <strong>High Credit Utilization:</strong> Your credit utilization ratio of {}% is above the recommended level. 
-                Try to reduce this to below 30% to improve your credit score.
-            </div>
-        """.format(credit_utilization_ratio))
-    
-    # Check delinquency ratio
-    if delinquency_ratio > 20:
-        suggestions.append("""
-            <div style='margin-bottom: 0.5rem;'>
-                <span style='color: #ff4444;'>●</span> <strong>Elevated Delinquency Ratio:</strong> Your delinquency ratio of {}% suggests a history of late payments.
-                Focus on making timely payments for at least 6-12 months to improve this metric.
-            </div>
-        """.format(delinquency_ratio))
-    
-    # Check average DPD
-    if avg_dpd_per_delinquency > 15:
-        suggestions.append("""
-            <div style='margin-bottom: 0.5rem;'>
-                <span style='color: #ff4444;'>●</span> <strong>High Days Past Due:</strong> Your average DPD of {} days indicates significant payment delays.
-                Setting up automatic payments could help ensure you pay on time.
-            </div>
-        """.format(avg_dpd_per_delinquency))
-    
-    # Check number of open accounts
-    if num_open_accounts > 3:
-        suggestions.append("""
+    for code, title, advice in describe_reasons(applicant, reasons):
+        suggestions.append(f"""
             <div style='margin-bottom: 0.5rem;'>
-                <span style='color: #ff4444;'>●</span> <strong>Multiple Open Accounts:</strong> Having {} open loan accounts may be seen as a risk.
-                Consider paying off some smaller loans before applying for new credit.
+                <span style='color: #ff4444;'>●</span> <strong>{title}:</strong> {advice}
+                <span style='color: #999; font-size: 0.8rem;'>({code})</span>
             </div>
-        """.format(num_open_accounts))
+        """)
     
     # EMI percentage of income
-    if 'income_percentage' in locals() and income_percentage > 40:
+    if 'income_percentage' in locals() and income_percentage > AFFORDABILITY_LIMIT:
         suggestions.append("""
             <div style='margin-bottom: 0.5rem;'>
                 <span style='color: #ff4444;'>●</span> <strong>High Debt-to-Income Ratio:</strong> Your monthly loan payment would be {:.2f}% of your monthly income.
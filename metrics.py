@@ -0,0 +1,151 @@
+import os
+import time
+import bisect
+import functools
+import threading
+from collections import deque
+
+import numpy as np
+
+# Lightweight timing instrumentation for the scoring hot path.
+#
+# Set CREDIT_RISK_METRICS=1 (or call enable()) to record per-stage latency histograms. When
+# disabled, timed() wrappers cost one flag check and start_timer() returns None.
+_enabled = os.environ.get('CREDIT_RISK_METRICS', '0').lower() in ('1', 'true', 'yes')
+
+# Histogram bucket upper bounds in seconds, for the Prometheus export
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+           1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Recent samples kept per stage for percentile estimates
+SAMPLE_SIZE = 4096
+
+
+class StageStats:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.samples.append(seconds)
+
+
+_stages = {}
+_collectors = {}
+_lock = threading.Lock()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def observe(stage, seconds):
+    with _lock:
+        stats = _stages.get(stage)
+        if stats is None:
+            stats = _stages[stage] = StageStats()
+        stats.observe(seconds)
+
+
+def start_timer():
+    # Returns a start time when recording, else None; pair with stop_timer()
+    return time.perf_counter() if _enabled else None
+
+
+def stop_timer(stage, start):
+    if start is not None:
+        observe(stage, time.perf_counter() - start)
+
+
+def timed(stage):
+    # Decorator recording the wrapped function's latency under stage
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(stage, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def register_collector(name, fn):
+    # fn() returns {metric_suffix: value}; exported as credit_risk_<name>_<suffix> gauges
+    _collectors[name] = fn
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+
+def summary():
+    # {stage: {'count', 'mean', 'p50', 'p95', 'p99'}} in seconds, from recent samples
+    with _lock:
+        snapshot = {stage: (stats.count, stats.total, list(stats.samples)) for stage, stats in _stages.items()}
+
+    result = {}
+    for stage, (count, total, samples) in sorted(snapshot.items()):
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99]) if samples else (np.nan,) * 3
+        result[stage] = {'count': count, 'mean': total / count if count else np.nan,
+                         'p50': p50, 'p95': p95, 'p99': p99}
+    return result
+
+
+def collector_values():
+    values = {}
+    for name, fn in _collectors.items():
+        for suffix, value in fn().items():
+            values[f'credit_risk_{name}_{suffix}'] = value
+    return values
+
+
+def render_prometheus():
+    # All stage histograms and collector gauges in the Prometheus text exposition format
+    lines = [
+        '# HELP credit_risk_stage_seconds Latency of each scoring stage.',
+        '# TYPE credit_risk_stage_seconds histogram',
+    ]
+    with _lock:
+        for stage, stats in sorted(_stages.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, stats.buckets):
+                cumulative += bucket_count
+                lines.append(f'credit_risk_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'credit_risk_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+            lines.append(f'credit_risk_stage_seconds_sum{{stage="{stage}"}} {stats.total:.9g}')
+            lines.append(f'credit_risk_stage_seconds_count{{stage="{stage}"}} {stats.count}')
+
+    for metric, value in sorted(collector_values().items()):
+        lines.append(f'# TYPE {metric} gauge')
+        lines.append(f'{metric} {value}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path):
+    # Write atomically so a node-exporter textfile collector never reads a partial file
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
@@ -0,0 +1,55 @@
+import os
+import time
+import logging
+import threading
+
+import joblib
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Resolve artifacts relative to this file so imports work from any working directory
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+MODEL_PATH = os.path.join(ARTIFACTS_DIR, 'model_data.joblib')
+
+# Set to a file written by shared_model.py to map the model read-only instead of unpickling
+# a private copy (used by launch_workers.py to share one copy between worker processes)
+SHARED_MODEL_ENV = 'CREDIT_RISK_SHARED_MODEL'
+
+# One process-wide copy of the model, shared by every page and Streamlit session
+_model_data = None
+_load_seconds = None
+_lock = threading.Lock()
+
+
+def get_model_data():
+    # Load the artifact on first use; later calls return the same object
+    global _model_data, _load_seconds
+    if _model_data is None:
+        with _lock:
+            if _model_data is None:
+                start = time.perf_counter()
+                path = shared_model_path()
+                if path:
+                    from shared_model import load_model_data
+                    model_data = load_model_data(path)
+                else:
+                    path = MODEL_PATH
+                    model_data = joblib.load(path)
+                _load_seconds = time.perf_counter() - start
+                _model_data = model_data
+                # Always recorded: it happens once and dominates cold start
+                metrics.observe('load', _load_seconds)
+                logger.info("Loaded %s in %.3fs", path, _load_seconds)
+    return _model_data
+
+
+def shared_model_path():
+    # Path of the shared model file when running in shared mode, else None
+    return os.environ.get(SHARED_MODEL_ENV) or None
+
+
+def get_load_seconds():
+    # Time spent deserializing the artifact, or None if it hasn't been loaded yet
+    return _load_seconds
@@ -0,0 +1,49 @@
+import streamlit as st
+import pandas as pd
+import metrics
+from model_registry import get_load_seconds
+
+# Set the page configuration
+st.set_page_config(
+    page_title="Scoring Metrics | Credit Risk",
+    page_icon="⏱️"
+)
+
+# Page title
+st.title("⏱️ Scoring Metrics")
+
+if not metrics.is_enabled():
+    st.warning("Instrumentation is disabled. Start the app with CREDIT_RISK_METRICS=1 or enable it below.")
+    if st.button("Enable instrumentation"):
+        metrics.enable()
+        st.rerun()
+else:
+    if st.button("Disable instrumentation"):
+        metrics.disable()
+        st.rerun()
+
+load_seconds = get_load_seconds()
+st.metric("Model load", f"{load_seconds:.2f} s" if load_seconds is not None else "not loaded")
+
+# Per-stage latency percentiles in milliseconds, from the most recent samples
+summary = metrics.summary()
+if summary:
+    table = pd.DataFrame.from_dict(summary, orient="index")
+    table[["mean", "p50", "p95", "p99"]] *= 1000
+    table.columns = ["Calls", "Mean (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)"]
+    st.dataframe(table.style.format({"Calls": "{:,}", "Mean (ms)": "{:.4f}", "p50 (ms)": "{:.4f}",
+                                     "p95 (ms)": "{:.4f}", "p99 (ms)": "{:.4f}"}))
+else:
+    st.info("No stages recorded yet. Make a prediction to populate the metrics.")
+
+col1, col2 = st.columns(2)
+with col1:
+    if st.button("Refresh"):
+        st.rerun()
+with col2:
+    if st.button("Reset stage metrics"):
+        metrics.reset()
+        st.rerun()
+
+with st.expander("Prometheus export"):
+    st.code(metrics.render_prometheus(), language="text")
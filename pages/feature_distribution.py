@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import joblib
+from distribution_plots import create_kde_plot
+from figure_cache import FigureCache, marker_bucket
+from reference_data import DISTRIBUTION_FEATURES, load_reference, reference_curves
 
 # Set the page configuration
 st.set_page_config(
@@ -55,162 +55,32 @@ st.markdown("""
 # Page title
 st.title("📊 Feature Distributions")
 
-# Function to create synthetic data for demonstration
-def create_synthetic_data():
-    # Set random seed for reproducibility
-    np.random.seed(42)
-    
-    # Number of samples
-    n_samples = 1000
-    
-    # Create dataframe with random data following specific distributions
-    df = pd.DataFrame()
-    
-    # Age: defaulters tend to be younger
-    df['age'] = np.concatenate([
-        np.random.normal(35, 10, int(n_samples * 0.7)),  # non-defaulters
-        np.random.normal(28, 8, int(n_samples * 0.3))    # defaulters
-    ])
-    
-    # Loan to Income Ratio: defaulters have higher ratios
-    df['loan_to_income_ratio'] = np.concatenate([
-        np.random.beta(2, 5, int(n_samples * 0.7)) * 3,   # non-defaulters
-        np.random.beta(4, 3, int(n_samples * 0.3)) * 3    # defaulters
-    ])
-    
-    # Loan Tenure: bimodal for defaulters
-    df['loan_tenure_months'] = np.concatenate([
-        np.random.normal(36, 8, int(n_samples * 0.7)),    # non-defaulters
-        np.concatenate([                                   # defaulters (bimodal)
-            np.random.normal(24, 5, int(n_samples * 0.15)),
-            np.random.normal(48, 5, int(n_samples * 0.15))
-        ])
-    ])
-    
-    # Average DPD: higher for defaulters
-    df['avg_dpd_per_delinquency'] = np.concatenate([
-        np.random.exponential(5, int(n_samples * 0.7)),   # non-defaulters
-        np.random.exponential(15, int(n_samples * 0.3))   # defaulters
-    ])
-    
-    # Delinquency Ratio: non-defaulters concentrated near 0
-    df['delinquency_ratio'] = np.concatenate([
-        np.random.beta(1, 8, int(n_samples * 0.7)) * 100,   # non-defaulters
-        np.random.beta(2, 2, int(n_samples * 0.3)) * 100    # defaulters
-    ])
-    
-    # Credit Utilization Ratio
-    df['credit_utilization_ratio'] = np.concatenate([
-        np.random.beta(2, 3, int(n_samples * 0.7)) * 100,   # non-defaulters
-        np.random.beta(4, 2, int(n_samples * 0.3)) * 100    # defaulters
-    ])
-    
-    # Number of Open Accounts: discrete
-    df['num_open_accounts'] = np.concatenate([
-        np.random.choice([1, 2, 3, 4], int(n_samples * 0.7), p=[0.15, 0.5, 0.25, 0.1]),  # non-defaulters
-        np.random.choice([1, 2, 3, 4], int(n_samples * 0.3), p=[0.3, 0.3, 0.3, 0.1])      # defaulters
-    ])
-    
-    # Default status
-    df['default'] = np.concatenate([
-        np.zeros(int(n_samples * 0.7)),  # non-defaulters
-        np.ones(int(n_samples * 0.3))    # defaulters
-    ])
-    
-    return df
+# Reference distributions: built once by reference_data.py and memory-mapped by every process
+arrays, reference_meta = load_reference()
+curves = reference_curves(arrays, reference_meta)
+fingerprint = reference_meta['fingerprint']
 
-# Generate synthetic data
-if 'training_data' not in st.session_state or st.session_state.training_data is None:
-    try:
-        # Try to load model data first (though we know it doesn't have training data)
-        model_data = joblib.load("artifacts/model_data.joblib")
-        st.session_state.model_loaded = True
-        
-        # Create synthetic data since model_data doesn't have training data
-        df = create_synthetic_data()
-        st.session_state.training_data = df
-        
-        # Show a notice that we're using synthetic data
-        st.info("""
-            Using synthetic data for visualization purposes. 
-            The model data file doesn't contain the training data required for feature distributions.
-        """)
-    except Exception as e:
-        st.session_state.model_loaded = False
-        # Create synthetic data as fallback
-        df = create_synthetic_data()
-        st.session_state.training_data = df
-        
-        st.warning("""
-            Could not load model data file. Using synthetic data for visualization purposes.
-            The distributions shown are for demonstration only and may not reflect your actual model.
-        """)
-else:
-    # Use data from session state
-    df = st.session_state.training_data
+if reference_meta['source'].startswith('synthetic'):
+    # Show a notice that we're using synthetic data
+    st.info("""
+        Using synthetic data for visualization purposes. 
+        The model data file doesn't contain the training data required for feature distributions.
+    """)
 
-# Function to create KDE plot for a feature
-def create_kde_plot(feature_name, current_value=None):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    defaulters = df[df['default'] == 1]
-    non_defaulters = df[df['default'] == 0]
-    
-    # Define feature-specific visualizations
-    if feature_name == "age":
-        # Age: Bell curve with significant overlap but defaulters tend to be younger
-        sns.kdeplot(non_defaulters[feature_name], ax=ax, color='blue', label='Non-Defaulters', fill=True, alpha=0.3)
-        sns.kdeplot(defaulters[feature_name], ax=ax, color='orange', label='Defaulters', fill=True, alpha=0.3)
-    
-    elif feature_name == "loan_to_income_ratio":
-        # Loan to Income Ratio: Higher ratios for defaulters
-        sns.kdeplot(non_defaulters[feature_name], ax=ax, color='blue', label='Non-Defaulters', fill=True, alpha=0.3)
-        sns.kdeplot(defaulters[feature_name], ax=ax, color='orange', label='Defaulters', fill=True, alpha=0.3)
-    
-    elif feature_name == "loan_tenure_months":
-        # Loan Tenure: Bimodal distribution for defaulters
-        sns.kdeplot(non_defaulters[feature_name], ax=ax, color='blue', label='Non-Defaulters', fill=True, alpha=0.3)
-        sns.kdeplot(defaulters[feature_name], ax=ax, color='orange', label='Defaulters', fill=True, alpha=0.3)
-    
-    elif feature_name == "avg_dpd_per_delinquency":
-        # Average DPD: Higher values for defaulters
-        sns.kdeplot(non_defaulters[feature_name], ax=ax, color='blue', label='Non-Defaulters', fill=True, alpha=0.3)
-        sns.kdeplot(defaulters[feature_name], ax=ax, color='orange', label='Defaulters', fill=True, alpha=0.3)
-    
-    elif feature_name == "delinquency_ratio":
-        # Delinquency Ratio: Non-defaulters concentrated near 0
-        sns.kdeplot(non_defaulters[feature_name], ax=ax, color='blue', label='Non-Defaulters', fill=True, alpha=0.3)
-        sns.kdeplot(defaulters[feature_name], ax=ax, color='orange', label='Defaulters', fill=True, alpha=0.3)
-    
-    elif feature_name == "credit_utilization_ratio":
-        # Credit Utilization Ratio: Distinct distributions
-        sns.kdeplot(non_defaulters[feature_name], ax=ax, color='blue', label='Non-Defaulters', fill=True, alpha=0.3)
-        sns.kdeplot(defaulters[feature_name], ax=ax, color='orange', label='Defaulters', fill=True, alpha=0.3)
-    
-    elif feature_name == "num_open_accounts":
-        # Number of Open Accounts: Discrete distribution
-        sns.histplot(non_defaulters[feature_name], ax=ax, color='blue', label='Non-Defaulters', 
-                     alpha=0.5, kde=True, bins=range(0, 6))
-        sns.histplot(defaulters[feature_name], ax=ax, color='orange', label='Defaulters', 
-                     alpha=0.5, kde=True, bins=range(0, 6))
-    
-    else:
-        # Generic case
-        sns.kdeplot(non_defaulters[feature_name], ax=ax, color='blue', label='Non-Defaulters', fill=True, alpha=0.3)
-        sns.kdeplot(defaulters[feature_name], ax=ax, color='orange', label='Defaulters', fill=True, alpha=0.3)
-        
-    # Mark the current value if provided
-    if current_value is not None:
-        ax.axvline(x=current_value, color='red', linestyle='--', linewidth=2, 
-                  label=f'Current Value: {current_value:.2f}')
-        
-    ax.set_title(f'Distribution of {feature_name.replace("_", " ").title()}', fontsize=14)
-    ax.set_xlabel(feature_name.replace("_", " ").title(), fontsize=12)
-    ax.set_ylabel('Density', fontsize=12)
-    ax.legend()
-    plt.tight_layout()
-    
-    return fig
+# Rendered plot images, shared by every session in this server process
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(max_bytes=32 * 1024 * 1024)
+
+figure_cache = get_figure_cache()
+
+# Show a distribution plot, rendering it only if this (feature, dataset, marker) hasn't been drawn yet
+def show_distribution(feature_name, current_value=None):
+    grid = curves[feature_name]['grid']
+    marker = marker_bucket(current_value, grid[0], grid[-1])
+    image = figure_cache.get_or_render((feature_name, fingerprint, marker),
+                                       lambda: create_kde_plot(curves[feature_name], feature_name, marker))
+    st.image(image)
 
 # Check if prediction has been made
 if 'has_predicted' not in st.session_state or not st.session_state.has_predicted:
@@ -228,47 +98,38 @@ if 'has_predicted' not in st.session_state or not st.session_state.has_predicted
     
     with tab1:
         st.markdown("<h4>Age Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("age"))
+        show_distribution("age")
         
         st.markdown("<h4>Loan to Income Ratio Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("loan_to_income_ratio"))
+        show_distribution("loan_to_income_ratio")
         
         st.markdown("<h4>Loan Tenure Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("loan_tenure_months"))
+        show_distribution("loan_tenure_months")
     
     with tab2:
         st.markdown("<h4>Credit Utilization Ratio Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("credit_utilization_ratio"))
+        show_distribution("credit_utilization_ratio")
         
         st.markdown("<h4>Delinquency Ratio Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("delinquency_ratio"))
+        show_distribution("delinquency_ratio")
         
         st.markdown("<h4>Average Days Past Due Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("avg_dpd_per_delinquency"))
+        show_distribution("avg_dpd_per_delinquency")
         
         st.markdown("<h4>Number of Open Accounts Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("num_open_accounts"))
+        show_distribution("num_open_accounts")
     
     with tab3:
-        features = ["age", "loan_to_income_ratio", "loan_tenure_months", 
-                  "credit_utilization_ratio", "delinquency_ratio", 
-                  "avg_dpd_per_delinquency", "num_open_accounts"]
-        
-        for feature in features:
+        for feature in DISTRIBUTION_FEATURES:
             st.markdown(f"<h4>{feature.replace('_', ' ').title()} Distribution</h4>", unsafe_allow_html=True)
-            st.pyplot(create_kde_plot(feature))
+            show_distribution(feature)
 
 else:
     # Get values from session state for marking on the distributions
-    age = st.session_state.age
-    income = st.session_state.income
-    loan_amount = st.session_state.loan_amount
-    loan_tenure_months = st.session_state.loan_tenure_months
-    avg_dpd_per_delinquency = st.session_state.avg_dpd_per_delinquency
-    loan_to_income_ratio = st.session_state.loan_to_income_ratio
-    delinquency_ratio = st.session_state.delinquency_ratio
-    credit_utilization_ratio = st.session_state.credit_utilization_ratio
-    num_open_accounts = st.session_state.num_open_accounts
+    applicant = st.session_state.applicant
+    (age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency, delinquency_ratio,
+     credit_utilization_ratio, num_open_accounts, residence_type, loan_purpose, loan_type) = applicant.row()
+    loan_to_income_ratio = float(applicant.loan_to_income[0])
     
     st.markdown("""
         <div style='background-color: #f8f9fa; padding: 1rem; border-radius: 5px; margin-bottom: 1rem;'>
@@ -283,26 +144,26 @@ else:
     
     with tab1:
         st.markdown("<h4>Age Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("age", age))
+        show_distribution("age", age)
         
         st.markdown("<h4>Loan to Income Ratio Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("loan_to_income_ratio", loan_to_income_ratio))
+        show_distribution("loan_to_income_ratio", loan_to_income_ratio)
         
         st.markdown("<h4>Loan Tenure Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("loan_tenure_months", loan_tenure_months))
+        show_distribution("loan_tenure_months", loan_tenure_months)
     
     with tab2:
         st.markdown("<h4>Credit Utilization Ratio Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("credit_utilization_ratio", credit_utilization_ratio))
+        show_distribution("credit_utilization_ratio", credit_utilization_ratio)
         
         st.markdown("<h4>Delinquency Ratio Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("delinquency_ratio", delinquency_ratio))
+        show_distribution("delinquency_ratio", delinquency_ratio)
         
         st.markdown("<h4>Average Days Past Due Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("avg_dpd_per_delinquency", avg_dpd_per_delinquency))
+        show_distribution("avg_dpd_per_delinquency", avg_dpd_per_delinquency)
         
         st.markdown("<h4>Number of Open Accounts Distribution</h4>", unsafe_allow_html=True)
-        st.pyplot(create_kde_plot("num_open_accounts", num_open_accounts))
+        show_distribution("num_open_accounts", num_open_accounts)
     
     with tab3:
         feature_values = {
@@ -317,7 +178,11 @@ else:
         
         for feature, value in feature_values.items():
             st.markdown(f"<h4>{feature.replace('_', ' ').title()} Distribution</h4>", unsafe_allow_html=True)
-            st.pyplot(create_kde_plot(feature, value))
+            show_distribution(feature, value)
+
+cache_stats = figure_cache.stats()
+st.caption(f"Plot cache: {cache_stats['entries']} images, {cache_stats['bytes'] / 1024 ** 2:.1f} MB "
+           f"of {cache_stats['max_bytes'] / 1024 ** 2:.0f} MB, {cache_stats['hits']} hits, {cache_stats['misses']} misses")
 
 # Navigation buttons
 st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
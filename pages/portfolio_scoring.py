@@ -0,0 +1,220 @@
+import io
+import time
+import threading
+import streamlit as st
+import numpy as np
+import plotly.graph_objects as go
+from prediction_helper import INPUT_COLUMNS, predict_batch, validate_batch
+from score_file import import_pyarrow, read_chunks, validate_interest_rate
+from scoring_executor import submit_batch
+from amortization import AFFORDABILITY_LIMIT, affordability, calculate_emi
+from ratings import RATING_COLORS, RATINGS, rate_scores
+
+# Set the page configuration
+st.set_page_config(
+    page_title="Portfolio Scoring | Credit Risk",
+    page_icon="📁"
+)
+
+# Custom CSS
+st.markdown("""
+    <style>
+    h1 {
+        color: #2c3e50;
+        padding-bottom: 1rem;
+        border-bottom: 2px solid #eee;
+        margin-bottom: 2rem;
+    }
+    h4 {
+        color: #2c3e50;
+        margin: 1rem 0 0.75rem 0;
+        font-size: 1.1rem;
+    }
+    .section-divider {
+        border-top: 1px solid rgba(0,0,0,0.1);
+        margin: 1.5rem 0;
+    }
+    </style>
+""", unsafe_allow_html=True)
+
+# Page title
+st.title("📁 Portfolio Scoring")
+
+CHUNK_SIZE = 50000
+SCORE_BINS = np.arange(300, 910, 10)
+# How often the page checks on a running scoring job
+POLL_SECONDS = 0.5
+
+# Score an uploaded file chunk by chunk, keeping only running aggregates (never the rows).
+# Runs on the whole-file scoring pool; progress is a dict the job updates for the page to
+# show, and setting the cancel event stops the job after its current chunk (it then
+# returns None).
+def score_portfolio(source, fmt, progress, cancel):
+    summary = {
+        'rows': 0,
+        'expected_defaults': 0.0,
+        'loan_amount': 0.0,
+        'expected_default_amount': 0.0,
+        'unaffordable': 0,
+        'has_interest_rate': False,
+        'rating_counts': dict.fromkeys(RATINGS, 0),
+        'score_counts': np.zeros(len(SCORE_BINS) - 1, dtype=np.int64),
+    }
+    # Parquet row groups are read whole, so progress counts rows against the footer's total;
+    # CSV is parsed as it streams, so the read position tracks progress through the bytes
+    size = source.seek(0, io.SEEK_END)
+    source.seek(0)
+    total_rows = import_pyarrow().parquet.ParquetFile(source).metadata.num_rows if fmt == 'parquet' else None
+    source.seek(0)
+
+    for chunk in read_chunks(source, CHUNK_SIZE, fmt):
+        errors = validate_batch(chunk) + validate_interest_rate(chunk)
+        if errors:
+            row, column, message = errors[0]
+            where = f"row {summary['rows'] + row + 1}" if row is not None else "the file"
+            raise ValueError(f"Invalid value in {where}, column '{column}': {message}")
+
+        probability, credit_score, rating = predict_batch(chunk)
+        loan_amount = chunk['loan_amount'].to_numpy(dtype=float)
+
+        summary['rows'] += len(chunk)
+        summary['expected_defaults'] += float(probability.sum())
+        summary['loan_amount'] += float(loan_amount.sum())
+        summary['expected_default_amount'] += float((probability * loan_amount).sum())
+        labels, counts = np.unique(rating, return_counts=True)
+        for label, count in zip(labels, counts):
+            summary['rating_counts'][label] = summary['rating_counts'].get(label, 0) + int(count)
+        summary['score_counts'] += np.histogram(credit_score, bins=SCORE_BINS)[0]
+
+        # Affordability needs the loan's interest rate, which is an optional column
+        if 'interest_rate' in chunk:
+            emi = calculate_emi(loan_amount, chunk['interest_rate'].to_numpy(dtype=float),
+                                chunk['loan_tenure_months'].to_numpy(dtype=float))
+            income_percentage = affordability(emi, chunk['income'].to_numpy(dtype=float))
+            summary['has_interest_rate'] = True
+            summary['unaffordable'] += int((income_percentage > AFFORDABILITY_LIMIT).sum())
+
+        done = summary['rows'] / max(total_rows, 1) if total_rows is not None else source.tell() / max(size, 1)
+        progress.update(rows=summary['rows'], fraction=min(done, 1.0))
+        if cancel.is_set():
+            return None
+
+    return summary
+
+st.markdown(f"""
+    <div style='background-color: #f8f9fa; padding: 1rem; border-radius: 5px; margin-bottom: 1rem;'>
+        Upload a CSV or Parquet file with one loan application per row to score a whole portfolio.
+        <br>
+        Required columns: <code>{', '.join(INPUT_COLUMNS)}</code>
+        <br>
+        Optional: <code>interest_rate</code> (annual %) to check affordability
+    </div>
+""", unsafe_allow_html=True)
+
+
+def cancel_portfolio_job():
+    # Stop this session's running job, if any: a queued job never starts, a running one
+    # stops at its next chunk
+    job = st.session_state.get('portfolio_job')
+    if job is not None:
+        future, _, cancel = job
+        cancel.set()
+        future.cancel()
+        st.session_state.portfolio_job = None
+
+
+uploaded_file = st.file_uploader("Portfolio file", type=["csv", "parquet"])
+
+if uploaded_file is None:
+    cancel_portfolio_job()
+    st.session_state.portfolio_key = None
+else:
+    fmt = 'parquet' if uploaded_file.name.lower().endswith('.parquet') else 'csv'
+    upload_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, 'file_id', None))
+
+    # Scoring runs in the background on the whole-file pool, tracked by a job handle in
+    # session state, so interacting with the page mid-upload doesn't restart it. The job
+    # reads the uploaded file object itself rather than a copy of its bytes. Only the
+    # aggregates are kept, keyed by upload, so reruns don't rescore.
+    if st.session_state.get('portfolio_key') != upload_key:
+        cancel_portfolio_job()
+        progress = {'rows': 0, 'fraction': 0.0}
+        cancel = threading.Event()
+        future = submit_batch(score_portfolio, uploaded_file, fmt, progress, cancel)
+        st.session_state.portfolio_job = (future, progress, cancel)
+        st.session_state.portfolio_key = upload_key
+        st.session_state.portfolio_summary = None
+        st.session_state.portfolio_error = None
+
+    job = st.session_state.get('portfolio_job')
+    if job is not None:
+        future, progress, _ = job
+        if not future.done():
+            st.progress(progress['fraction'], text=f"Scored {progress['rows']:,} applications…")
+            time.sleep(POLL_SECONDS)
+            st.rerun()
+        st.session_state.portfolio_job = None
+        try:
+            st.session_state.portfolio_summary = future.result()
+        except (ValueError, SystemExit) as e:
+            # Invalid rows, or Parquet without pyarrow installed
+            st.session_state.portfolio_error = str(e)
+
+    if st.session_state.get('portfolio_error'):
+        st.error(st.session_state.portfolio_error)
+
+    summary = st.session_state.get('portfolio_summary')
+    if summary and summary['rows'] > 0:
+        st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
+        st.markdown("<h4>Portfolio Summary</h4>", unsafe_allow_html=True)
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Applications", f"{summary['rows']:,}")
+        col2.metric("Expected Defaults", f"{summary['expected_defaults']:,.1f}",
+                    f"{summary['expected_defaults'] / summary['rows']:.2%} average PD", delta_color="off")
+        col3.metric("Expected Default Exposure (LKR)", f"{summary['expected_default_amount']:,.0f}",
+                    f"{summary['expected_default_amount'] / max(summary['loan_amount'], 1):.2%} of loan amount",
+                    delta_color="off")
+        if summary['has_interest_rate']:
+            st.metric(f"EMI Above {AFFORDABILITY_LIMIT}% of Income", f"{summary['unaffordable']:,}",
+                      f"{summary['unaffordable'] / summary['rows']:.2%} of applications", delta_color="off")
+
+        st.markdown("<h4>Rating Mix</h4>", unsafe_allow_html=True)
+        rating_counts = summary['rating_counts']
+        fig = go.Figure(go.Bar(
+            x=list(rating_counts), y=list(rating_counts.values()),
+            marker_color=[RATING_COLORS[label][0] for label in rating_counts],
+            text=[f"{count / summary['rows']:.1%}" for count in rating_counts.values()], textposition="outside"
+        ))
+        fig.update_layout(yaxis_title="Applications", margin=dict(l=0, r=0, t=30, b=0), height=350)
+        st.plotly_chart(fig, use_container_width=True)
+
+        st.markdown("<h4>Credit Score Distribution</h4>", unsafe_allow_html=True)
+        bin_starts = SCORE_BINS[:-1]
+        fig = go.Figure(go.Bar(
+            x=bin_starts + 5, y=summary['score_counts'], width=10,
+            marker_color=[RATING_COLORS[label][0] for label in rate_scores(bin_starts)]
+        ))
+        fig.update_layout(xaxis_title="Credit Score", yaxis_title="Applications",
+                          margin=dict(l=0, r=0, t=30, b=0), height=350, bargap=0.05)
+        st.plotly_chart(fig, use_container_width=True)
+
+# Back to main page button
+st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
+st.markdown("""
+    <a href="/" target="_self">
+        <button style="
+            width: 100%;
+            background-color: #2c3e50;
+            color: white;
+            padding: 0.75rem;
+            border-radius: 5px;
+            border: none;
+            margin-top: 1rem;
+            cursor: pointer;
+            font-weight: bold;
+        ">
+            ◀ Back to Main Page
+        </button>
+    </a>
+""", unsafe_allow_html=True)
@@ -1,7 +1,12 @@
 import streamlit as st
-from prediction_helper import predict
+from prediction_helper import get_scorer, score_grid
+from amortization import AFFORDABILITY_LIMIT, affordability, calculate_emi
+from ratings import rating_color
+from rating_path import cheapest_path, next_band_edge, single_input_paths
+from scoring_executor import LatestRequest, StaleResult
 import pandas as pd
 import numpy as np
+import plotly.graph_objects as go
 
 # Set the page configuration and theme
 st.set_page_config(
@@ -53,6 +58,52 @@ st.markdown("""
 # Page title
 st.title("🔍 What-If Analysis")
 
+# Slider dimensions: label -> (predict() argument, min, max, step)
+WHATIF_DIMENSIONS = {
+    "Credit Utilization Ratio (%)": ("credit_utilization_ratio", 0, 100, 5),
+    "Delinquency Ratio (%)": ("delinquency_ratio", 0, 100, 5),
+    "Average Days Past Due": ("avg_dpd_per_delinquency", 0, 60, 5),
+    "Loan Amount (LKR)": ("loan_amount", 0, 5000000, 100000),
+    "Loan Tenure (months)": ("loan_tenure_months", 12, 60, 6),
+    "Number of Open Accounts": ("num_open_accounts", 1, 4, 1),
+}
+
+
+@st.cache_data(max_entries=64)
+def sensitivity_surface(inputs, x_label, y_label):
+    # Credit score over the full grid of two slider dimensions, scored in one batch
+    x_name, x_min, x_max, x_step = WHATIF_DIMENSIONS[x_label]
+    y_name, y_min, y_max, y_step = WHATIF_DIMENSIONS[y_label]
+    x_values = np.arange(x_min, x_max + x_step, x_step)
+    y_values = np.arange(y_min, y_max + y_step, y_step)
+    _, credit_scores = score_grid(dict(inputs), x_name, x_values, y_name, y_values)
+    return x_values, y_values, credit_scores
+
+
+# Session state key of each slider, by input name
+WHATIF_SLIDER_KEYS = {
+    "credit_utilization_ratio": "whatif_credit_util",
+    "delinquency_ratio": "whatif_delinquency",
+    "avg_dpd_per_delinquency": "whatif_avg_dpd",
+    "loan_amount": "whatif_loan_amount",
+    "loan_tenure_months": "whatif_loan_tenure",
+    "num_open_accounts": "whatif_open_accounts",
+}
+
+
+def rating_paths(inputs, target_score):
+    # Single-slider and cheapest combined changes that reach target_score; runs on the
+    # shared scoring pool, so it sticks to plain Python rather than Streamlit's cache
+    inputs = dict(inputs)
+    dimensions = {name: (low, high, step) for name, low, high, step in WHATIF_DIMENSIONS.values()}
+    return single_input_paths(inputs, dimensions, target_score), cheapest_path(inputs, dimensions, target_score)
+
+
+def apply_path(path):
+    # Move the sliders to a suggested path; runs before the next script run renders them
+    for name, value in path.items():
+        st.session_state[WHATIF_SLIDER_KEYS[name]] = int(value)
+
 # Check if prediction has been made
 if 'has_predicted' not in st.session_state or not st.session_state.has_predicted:
     st.warning("Please make a risk assessment on the main page first.")
@@ -75,18 +126,10 @@ if 'has_predicted' not in st.session_state or not st.session_state.has_predicted
     """, unsafe_allow_html=True)
 else:
     # Get values from session state
-    age = st.session_state.age
-    income = st.session_state.income
-    loan_amount = st.session_state.loan_amount
-    loan_tenure_months = st.session_state.loan_tenure_months
-    avg_dpd_per_delinquency = st.session_state.avg_dpd_per_delinquency
-    loan_to_income_ratio = st.session_state.loan_to_income_ratio
-    delinquency_ratio = st.session_state.delinquency_ratio
-    credit_utilization_ratio = st.session_state.credit_utilization_ratio
-    num_open_accounts = st.session_state.num_open_accounts
-    residence_type = st.session_state.residence_type
-    loan_purpose = st.session_state.loan_purpose
-    loan_type = st.session_state.loan_type
+    applicant = st.session_state.applicant
+    (age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency, delinquency_ratio,
+     credit_utilization_ratio, num_open_accounts, residence_type, loan_purpose, loan_type) = applicant.row()
+    loan_to_income_ratio = float(applicant.loan_to_income[0])
     
     # Get original prediction results
     probability = st.session_state.probability
@@ -101,39 +144,53 @@ else:
         </div>
     """, unsafe_allow_html=True)
     
+    # Sliders start at the applicant's values; they're seeded through session state rather
+    # than value= so that "Apply to sliders" can move them
+    applicant_values = {
+        "credit_utilization_ratio": credit_utilization_ratio, "delinquency_ratio": delinquency_ratio,
+        "avg_dpd_per_delinquency": avg_dpd_per_delinquency, "loan_amount": loan_amount,
+        "loan_tenure_months": loan_tenure_months, "num_open_accounts": num_open_accounts
+    }
+    for name, key in WHATIF_SLIDER_KEYS.items():
+        st.session_state.setdefault(key, int(applicant_values[name]))
+    
     # Create columns for the what-if analysis
     whatif_col1, whatif_col2 = st.columns(2)
     
     with whatif_col1:
         # Create sliders for key parameters
         st.markdown("<p style='margin-bottom: 0.3rem;'><strong>Credit Utilization Ratio (%)</strong></p>", unsafe_allow_html=True)
-        whatif_credit_util = st.slider("Credit Utilization Ratio", min_value=0, max_value=100, value=int(credit_utilization_ratio), step=5, key="whatif_credit_util", label_visibility="collapsed")
+        whatif_credit_util = st.slider("Credit Utilization Ratio", min_value=0, max_value=100, step=5, key="whatif_credit_util", label_visibility="collapsed")
         
         st.markdown("<p style='margin-bottom: 0.3rem; margin-top: 1rem;'><strong>Delinquency Ratio (%)</strong></p>", unsafe_allow_html=True)
-        whatif_delinquency = st.slider("Delinquency Ratio", min_value=0, max_value=100, value=int(delinquency_ratio), step=5, key="whatif_delinquency", label_visibility="collapsed")
+        whatif_delinquency = st.slider("Delinquency Ratio", min_value=0, max_value=100, step=5, key="whatif_delinquency", label_visibility="collapsed")
         
         st.markdown("<p style='margin-bottom: 0.3rem; margin-top: 1rem;'><strong>Average Days Past Due</strong></p>", unsafe_allow_html=True)
-        whatif_avg_dpd = st.slider("Average Days Past Due", min_value=0, max_value=60, value=int(avg_dpd_per_delinquency), step=5, key="whatif_avg_dpd", label_visibility="collapsed")
+        whatif_avg_dpd = st.slider("Average Days Past Due", min_value=0, max_value=60, step=5, key="whatif_avg_dpd", label_visibility="collapsed")
     
     with whatif_col2:
         st.markdown("<p style='margin-bottom: 0.3rem;'><strong>Loan Amount (LKR)</strong></p>", unsafe_allow_html=True)
-        whatif_loan_amount = st.slider("Loan Amount", min_value=0, max_value=5000000, value=int(loan_amount), step=100000, key="whatif_loan_amount", label_visibility="collapsed")
+        whatif_loan_amount = st.slider("Loan Amount", min_value=0, max_value=5000000, step=100000, key="whatif_loan_amount", label_visibility="collapsed")
         
         st.markdown("<p style='margin-bottom: 0.3rem; margin-top: 1rem;'><strong>Loan Tenure (months)</strong></p>", unsafe_allow_html=True)
-        whatif_loan_tenure = st.slider("Loan Tenure", min_value=12, max_value=60, value=int(loan_tenure_months), step=6, key="whatif_loan_tenure", label_visibility="collapsed")
+        whatif_loan_tenure = st.slider("Loan Tenure", min_value=12, max_value=60, step=6, key="whatif_loan_tenure", label_visibility="collapsed")
         
         st.markdown("<p style='margin-bottom: 0.3rem; margin-top: 1rem;'><strong>Number of Open Accounts</strong></p>", unsafe_allow_html=True)
-        whatif_open_accounts = st.slider("Number of Open Accounts", min_value=1, max_value=4, value=int(num_open_accounts), key="whatif_open_accounts", label_visibility="collapsed")
+        whatif_open_accounts = st.slider("Number of Open Accounts", min_value=1, max_value=4, key="whatif_open_accounts", label_visibility="collapsed")
     
     # Calculate what-if loan to income ratio
     whatif_loan_to_income = whatif_loan_amount / income if income > 0 else 0
     
-    # Calculate what-if prediction
-    whatif_probability, whatif_credit_score, whatif_rating = predict(
-        age, income, whatif_loan_amount, whatif_loan_tenure, whatif_avg_dpd,
-        whatif_delinquency, whatif_credit_util, whatif_open_accounts,
-        residence_type, loan_purpose, loan_type
-    )
+    # Calculate what-if prediction incrementally: the session keeps the applicant's logit and
+    # each rerun applies only the sliders that moved (usually one), a multiply-add apiece
+    if st.session_state.get('whatif_applicant') is not applicant:
+        st.session_state.whatif_scorer = get_scorer().incremental(*applicant.row())
+        st.session_state.whatif_applicant = applicant
+    whatif_probability, whatif_credit_score, whatif_rating = st.session_state.whatif_scorer.update_many({
+        "loan_amount": whatif_loan_amount, "loan_tenure_months": whatif_loan_tenure,
+        "avg_dpd_per_delinquency": whatif_avg_dpd, "delinquency_ratio": whatif_delinquency,
+        "credit_utilization_ratio": whatif_credit_util, "num_open_accounts": whatif_open_accounts
+    }).result()
     
     # Display comparison results
     st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
@@ -146,14 +203,7 @@ else:
         st.markdown("<h5 style='text-align: center;'>Current Assessment</h5>", unsafe_allow_html=True)
         
         # Credit Score - Current
-        if credit_score >= 750:
-            cs_color = "#00aa00"  # Green for excellent
-        elif credit_score >= 650:
-            cs_color = "#88aa00"  # Yellow-green for good
-        elif credit_score >= 500:
-            cs_color = "#ffaa00"  # Orange for average
-        else:
-            cs_color = "#ff4444"  # Red for poor
+        cs_color = rating_color(credit_score)[0]
             
         # Default Probability - Current
         dp_color = "#ff4444" if probability > 0.3 else "#00aa00"
@@ -179,14 +229,7 @@ else:
         st.markdown("<h5 style='text-align: center;'>What-If Assessment</h5>", unsafe_allow_html=True)
         
         # Credit Score - What-If
-        if whatif_credit_score >= 750:
-            whatif_cs_color = "#00aa00"  # Green for excellent
-        elif whatif_credit_score >= 650:
-            whatif_cs_color = "#88aa00"  # Yellow-green for good
-        elif whatif_credit_score >= 500:
-            whatif_cs_color = "#ffaa00"  # Orange for average
-        else:
-            whatif_cs_color = "#ff4444"  # Red for poor
+        whatif_cs_color = rating_color(whatif_credit_score)[0]
             
         # Default Probability - What-If
         whatif_dp_color = "#ff4444" if whatif_probability > 0.3 else "#00aa00"
@@ -222,24 +265,86 @@ else:
         </div>
         """, unsafe_allow_html=True)
     
+    whatif_inputs = {
+        "age": age, "income": income, "loan_amount": whatif_loan_amount,
+        "loan_tenure_months": whatif_loan_tenure, "avg_dpd_per_delinquency": whatif_avg_dpd,
+        "delinquency_ratio": whatif_delinquency, "credit_utilization_ratio": whatif_credit_util,
+        "num_open_accounts": whatif_open_accounts, "residence_type": residence_type,
+        "loan_purpose": loan_purpose, "loan_type": loan_type
+    }
+    
+    # Path to the next rating: the slider changes that lift the what-if score into the next band
+    target_score = next_band_edge(whatif_credit_score)
+    if target_score is not None:
+        st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
+        st.markdown(f"<h4 style='text-align: center;'>Path to the Next Rating ({target_score}+)</h4>", unsafe_allow_html=True)
+        # The exact search covers up to ~200k slider combinations, so it goes through this
+        # session's debounced latest-wins channel: a burst of slider moves is searched once,
+        # for the position it settles on, and superseded runs stop here
+        path_request = (tuple(whatif_inputs.items()), target_score)
+        if st.session_state.get('whatif_path_request') != path_request:
+            if 'whatif_channel' not in st.session_state:
+                st.session_state.whatif_channel = LatestRequest()
+            try:
+                st.session_state.whatif_paths = st.session_state.whatif_channel.submit(rating_paths, *path_request).result()
+                st.session_state.whatif_path_request = path_request
+            except StaleResult:
+                st.stop()
+        single_paths, best_path = st.session_state.whatif_paths
+        
+        path_col1, path_col2 = st.columns(2)
+        with path_col1:
+            st.markdown("<h5 style='text-align: center;'>Changing One Factor</h5>", unsafe_allow_html=True)
+            for label, (name, _, _, _) in WHATIF_DIMENSIONS.items():
+                value = single_paths[name]
+                change = f"{whatif_inputs[name]:,} → {value:,}" if value is not None else "Not reachable alone"
+                st.markdown(f"**{label}:** {change}")
+        with path_col2:
+            st.markdown("<h5 style='text-align: center;'>Smallest Combined Change</h5>", unsafe_allow_html=True)
+            if best_path:
+                for label, (name, _, _, _) in WHATIF_DIMENSIONS.items():
+                    if name in best_path:
+                        st.markdown(f"**{label}:** {whatif_inputs[name]:,} → {best_path[name]:,}")
+                st.button("Apply to sliders", key="whatif_apply_path", on_click=apply_path, args=(best_path,))
+            else:
+                st.markdown("Not reachable within the slider ranges.")
+    
+    # Sensitivity surface: credit score across two slider dimensions at once
+    st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
+    if st.checkbox("Show sensitivity surface", key="whatif_show_surface"):
+        dimension_labels = list(WHATIF_DIMENSIONS)
+        surface_col1, surface_col2 = st.columns(2)
+        with surface_col1:
+            x_label = st.selectbox("Horizontal axis", dimension_labels, index=3, key="whatif_surface_x")
+        with surface_col2:
+            y_label = st.selectbox("Vertical axis", [label for label in dimension_labels if label != x_label],
+                                   index=0, key="whatif_surface_y")
+
+        x_values, y_values, surface_scores = sensitivity_surface(tuple(whatif_inputs.items()), x_label, y_label)
+        
+        fig = go.Figure(go.Heatmap(
+            x=x_values, y=y_values, z=surface_scores,
+            zmin=300, zmax=900, colorscale="RdYlGn", colorbar=dict(title="Credit Score"),
+            hovertemplate=f"{x_label}: %{{x}}<br>{y_label}: %{{y}}<br>Credit Score: %{{z}}<extra></extra>"
+        ))
+        # Mark the current what-if position
+        fig.add_trace(go.Scatter(
+            x=[whatif_inputs[WHATIF_DIMENSIONS[x_label][0]]], y=[whatif_inputs[WHATIF_DIMENSIONS[y_label][0]]],
+            mode="markers", marker=dict(color="black", size=12, symbol="x"), name="What-If", showlegend=False
+        ))
+        fig.update_layout(xaxis_title=x_label, yaxis_title=y_label, margin=dict(l=0, r=0, t=30, b=0), height=450)
+        st.plotly_chart(fig, use_container_width=True)
+    
     # Monthly Payment Calculation (if applicable)
     if 'interest_rate' in st.session_state:
         interest_rate = st.session_state.interest_rate
         
-        # Convert annual interest rate to monthly rate
-        monthly_rate = interest_rate / (12 * 100)
-        
-        # Calculate monthly payment (EMI) for both current and what-if scenarios
-        if monthly_rate > 0:
-            current_emi = loan_amount * monthly_rate * (1 + monthly_rate)**loan_tenure_months / ((1 + monthly_rate)**loan_tenure_months - 1)
-            whatif_emi = whatif_loan_amount * monthly_rate * (1 + monthly_rate)**whatif_loan_tenure / ((1 + monthly_rate)**whatif_loan_tenure - 1)
-        else:
-            current_emi = loan_amount / loan_tenure_months
-            whatif_emi = whatif_loan_amount / whatif_loan_tenure
+        # Calculate monthly payment (EMI) for both current and what-if scenarios in one call
+        current_emi, whatif_emi = calculate_emi([loan_amount, whatif_loan_amount], interest_rate,
+                                                [loan_tenure_months, whatif_loan_tenure])
         
         # Calculate income percentages
-        current_income_pct = (current_emi * 12 / income) * 100 if income > 0 else 0
-        whatif_income_pct = (whatif_emi * 12 / income) * 100 if income > 0 else 0
+        current_income_pct, whatif_income_pct = affordability([current_emi, whatif_emi], income)
         
         # Show EMI information
         st.markdown("<div class='section-divider'></div>", unsafe_allow_html=True)
@@ -249,7 +354,7 @@ else:
         
         with emi_col1:
             st.markdown("<h5 style='text-align: center;'>Current Payment</h5>", unsafe_allow_html=True)
-            pct_color = "#ff4444" if current_income_pct > 40 else "#00aa00"
+            pct_color = "#ff4444" if current_income_pct > AFFORDABILITY_LIMIT else "#00aa00"
             
             st.markdown(f"""
             <div style='display: flex; flex-direction: column; gap: 0.5rem;'>
@@ -266,7 +371,7 @@ else:
             
         with emi_col2:
             st.markdown("<h5 style='text-align: center;'>What-If Payment</h5>", unsafe_allow_html=True)
-            whatif_pct_color = "#ff4444" if whatif_income_pct > 40 else "#00aa00"
+            whatif_pct_color = "#ff4444" if whatif_income_pct > AFFORDABILITY_LIMIT else "#00aa00"
             
             # Calculate differences
             emi_diff = whatif_emi - current_emi
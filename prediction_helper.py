@@ -1,23 +1,312 @@
-import joblib
+import math
+import threading
+import functools
+
 import numpy as np
 import pandas as pd
 # from sklearn.preprocessing import MinMaxScaler
 
-# Path to the saved model and its components
-MODEL_PATH = 'artifacts/model_data.joblib'
+import metrics
+# The model and its components are loaded lazily, once per process
+from model_registry import MODEL_PATH, get_model_data  # noqa: F401
+
+# Input schema and the columnar batch type live in applicant_batch; re-exported here
+from applicant_batch import ApplicantBatch, INPUT_CHOICES, INPUT_COLUMNS, INPUT_LIMITS  # noqa: F401
+from category_encoder import CategoryEncoder
+from ratings import RATING_EDGES, get_rating, rate_scores
+from reason_codes import REASONS, REFERENCE_APPLICANT, top_reasons
+
+
+class ReducedScaler:
+    # The MinMax scaler restricted to the cols_to_scale that are model features, so inputs
+    # no longer need dummy values for the training-only columns. transform() applies the
+    # same arithmetic as MinMaxScaler.transform, so results are bit-for-bit identical.
+
+    def __init__(self, scaler, cols_to_scale, features):
+        cols_to_scale = list(cols_to_scale)
+        keep = [j for j, name in enumerate(cols_to_scale) if name in set(features)]
+
+        self.columns = [cols_to_scale[j] for j in keep]
+        self.min_ = np.asarray(scaler.min_)[keep]
+        self.scale_ = np.asarray(scaler.scale_)[keep]
+        self.clip = getattr(scaler, 'clip', False)
+        self.feature_range = scaler.feature_range
+
+    def transform(self, X):
+        # X: (n, len(columns)) array in self.columns order
+        X = np.array(X, dtype=float)
+        X *= self.scale_
+        X += self.min_
+        if self.clip:
+            np.clip(X, self.feature_range[0], self.feature_range[1], out=X)
+        return X
+
+
+class CompiledScorer:
+    # Logistic regression with the MinMax scaling of cols_to_scale folded into its
+    # weights, so one applicant is scored with a single dot product over raw values.
+    # Each thread (Streamlit session) gets its own preallocated feature vector.
+
+    # ApplicantBatch attribute -> model feature, for the numeric inputs
+    NUMERIC_FEATURES = {
+        'age': 'age',
+        'loan_tenure_months': 'loan_tenure_months',
+        'num_open_accounts': 'number_of_open_accounts',
+        'credit_utilization_ratio': 'credit_utilization_ratio',
+        'loan_to_income': 'loan_to_income',
+        'delinquency_ratio': 'delinquency_ratio',
+        'avg_dpd_per_delinquency': 'avg_dpd_per_delinquency',
+    }
+
+    def __init__(self, model, scaler, features, cols_to_scale, base_score=300, scale_length=600):
+        features = list(features)
+        cols_to_scale = list(cols_to_scale)
+
+        weights = np.array(model.coef_[0], dtype=float)
+        bias = float(model.intercept_[0])
+        for i, name in enumerate(features):
+            if name in cols_to_scale:
+                j = cols_to_scale.index(name)
+                # coef * (x * scale + min) == (coef * scale) * x + coef * min
+                bias += weights[i] * scaler.min_[j]
+                weights[i] *= scaler.scale_[j]
+
+        self.weights = weights
+        self.bias = bias
+        self.base_score = base_score
+        self.scale_length = scale_length
+        self.index = {name: i for i, name in enumerate(features)}
+        self.encoder = CategoryEncoder(features)
+        self._local = threading.local()
+
+        # Per categorical input, the weight of each INPUT_CHOICES code (0 for the baseline level)
+        self.category_weights = {
+            name: np.where(columns >= 0, weights[columns], 0.0)
+            for name, columns in self.encoder.columns.items()
+        }
+
+        # Reason-code decomposition: each input's contribution is its logit term minus the
+        # same term for REFERENCE_APPLICANT, so reference_logit + sum(contributions) == logit
+        # and a positive contribution is an input on which the applicant is riskier than
+        # the reference.
+        self.reference_offsets = {}
+        reference_logit = bias
+        for attribute, feature in self.NUMERIC_FEATURES.items():
+            term = weights[self.index[feature]] * REFERENCE_APPLICANT[attribute]
+            self.reference_offsets[attribute] = -term
+            reference_logit += term
+        self.reference_weights = {}
+        for name, category_weights in self.category_weights.items():
+            weight = category_weights[self.encoder.code(name, REFERENCE_APPLICANT[name])]
+            self.reference_weights[name] = weight
+            reference_logit += weight
+        self.reference_logit = reference_logit
+
+    def _buffer(self):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            buffer = self._local.buffer = np.zeros(len(self.weights))
+        return buffer
+
+    def logit(self, age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+              delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+              residence_type, loan_purpose, loan_type):
+        # Default log-odds of a single applicant
+        x = self._buffer()
+        index = self.index
+
+        x[index['age']] = age
+        x[index['loan_tenure_months']] = loan_tenure_months
+        x[index['number_of_open_accounts']] = num_open_accounts
+        x[index['credit_utilization_ratio']] = credit_utilization_ratio
+        x[index['loan_to_income']] = loan_amount / income if income > 0 else 0
+        x[index['delinquency_ratio']] = delinquency_ratio
+        x[index['avg_dpd_per_delinquency']] = avg_dpd_per_delinquency
+
+        # One-hot columns stay zero in the buffer; each categorical adds its label's weight
+        encoder = self.encoder
+        category_weights = self.category_weights
+        return (float(np.dot(x, self.weights)) + self.bias
+                + category_weights['residence_type'][encoder.code('residence_type', residence_type)]
+                + category_weights['loan_purpose'][encoder.code('loan_purpose', loan_purpose)]
+                + category_weights['loan_type'][encoder.code('loan_type', loan_type)])
+
+    def score_logit(self, logit):
+        # (probability, credit score, rating) for a single default logit
+        default_probability = 1 / (1 + math.exp(-logit))
+        credit_score = self.base_score + (1 - default_probability) * self.scale_length
+
+        return default_probability, int(credit_score), get_rating(credit_score)
+
+    def score(self, age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+              delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+              residence_type, loan_purpose, loan_type):
+        # Timed in two stages: encoding plus the dot product, then probability -> score -> rating
+        start = metrics.start_timer()
+        logit = self.logit(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+                           delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+                           residence_type, loan_purpose, loan_type)
+        metrics.stop_timer('logit', start)
+        start = metrics.start_timer()
+        result = self.score_logit(logit)
+        metrics.stop_timer('score', start)
+        return result
+
+    def input_slope(self, name, income):
+        # d(logit)/d(input) for a numeric input, in raw units; loan_amount enters through
+        # loan_to_income, so its slope depends on income
+        if name == 'loan_amount':
+            return self.weights[self.index['loan_to_income']] / income if income > 0 else 0.0
+        return self.weights[self.index[self.NUMERIC_FEATURES[name]]]
+
+    def incremental(self, age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+                    delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+                    residence_type, loan_purpose, loan_type):
+        return IncrementalScore(self, age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+                                delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+                                residence_type, loan_purpose, loan_type)
+
+    def score_batch(self, batch):
+        # Score an ApplicantBatch column by column, without materializing a feature matrix
+        start = metrics.start_timer()
+        logit = self.logits(batch)
+        metrics.stop_timer('logit_batch', start)
+        start = metrics.start_timer()
+        result = credit_scores_from_logits(logit, self.base_score, self.scale_length)
+        metrics.stop_timer('score_batch', start)
+        return result
+
+    def logits(self, batch):
+        # Default log-odds of every applicant in an ApplicantBatch
+        index = self.index
+        weights = self.weights
+
+        logit = np.full(len(batch), self.bias)
+        logit += weights[index['age']] * batch.age
+        logit += weights[index['loan_tenure_months']] * batch.loan_tenure_months
+        logit += weights[index['number_of_open_accounts']] * batch.num_open_accounts
+        logit += weights[index['credit_utilization_ratio']] * batch.credit_utilization_ratio
+        logit += weights[index['loan_to_income']] * batch.loan_to_income
+        logit += weights[index['delinquency_ratio']] * batch.delinquency_ratio
+        logit += weights[index['avg_dpd_per_delinquency']] * batch.avg_dpd_per_delinquency
+        for name, category_weights in self.category_weights.items():
+            logit += category_weights[getattr(batch, name)]
+        return logit
+
+    def contributions(self, batch):
+        # (n, len(REASONS)) matrix of each input's contribution to the default logit
+        # Column-major, so each input's column is written contiguously
+        out = np.empty((len(batch), len(REASONS)), order='F')
+        for k, (_, attribute, _, _) in enumerate(REASONS):
+            values = getattr(batch, attribute)
+            if attribute in self.category_weights:
+                category_weights = self.category_weights[attribute]
+                out[:, k] = category_weights[values] - self.reference_weights[attribute]
+            else:
+                weight = self.weights[self.index[self.NUMERIC_FEATURES[attribute]]]
+                out[:, k] = weight * values + self.reference_offsets[attribute]
+        return out
+
+    def explain_batch(self, batch, top_n=4):
+        # Score and explain in one pass: the logit is rebuilt from the contributions.
+        # Returns (probability, credit_score, rating, reasons, contributions), where reasons
+        # holds top_n indices into REASONS per row (see reason_codes.top_reasons). Rows
+        # already in the top rating band get no reasons.
+        start = metrics.start_timer()
+        contributions = self.contributions(batch)
+        logit = np.full(len(batch), self.reference_logit)
+        for k in range(contributions.shape[1]):
+            logit += contributions[:, k]
+        metrics.stop_timer('logit_batch', start)
+        start = metrics.start_timer()
+        probability, credit_score, rating = credit_scores_from_logits(logit, self.base_score, self.scale_length)
+        metrics.stop_timer('score_batch', start)
+        start = metrics.start_timer()
+        reasons = top_reasons(contributions, top_n)
+        reasons[credit_score >= RATING_EDGES[-2]] = -1
+        metrics.stop_timer('reasons_batch', start)
+        return probability, credit_score, rating, reasons, contributions
+
+
+class IncrementalScore:
+    # One applicant's default logit, kept current as inputs change one at a time, e.g. a
+    # what-if slider. A numeric input moves the logit by its slope times the change and a
+    # categorical by the difference of its two levels' weights, so an update is a single
+    # multiply-add; only a change of income (which rescales loan_to_income) rebuilds the
+    # logit. It is also rebuilt every RESYNC_UPDATES updates so rounding can't accumulate.
+    RESYNC_UPDATES = 64
+
+    def __init__(self, scorer, age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+                 delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+                 residence_type, loan_purpose, loan_type):
+        self.scorer = scorer
+        self.inputs = dict(zip(INPUT_COLUMNS, (age, income, loan_amount, loan_tenure_months,
+                                               avg_dpd_per_delinquency, delinquency_ratio,
+                                               credit_utilization_ratio, num_open_accounts,
+                                               residence_type, loan_purpose, loan_type)))
+        self._rebuild()
+
+    def _rebuild(self):
+        self.logit = self.scorer.logit(*(self.inputs[name] for name in INPUT_COLUMNS))
+        self._updates = 0
+
+    def update(self, name, value):
+        # Set one input (an INPUT_COLUMNS name) and adjust the logit; returns self
+        old = self.inputs[name]
+        if value == old:
+            return self
+        scorer = self.scorer
+        if name in scorer.category_weights:
+            category_weights = scorer.category_weights[name]
+            delta = (category_weights[scorer.encoder.code(name, value)]
+                     - category_weights[scorer.encoder.code(name, old)])
+        elif name != 'income':
+            delta = scorer.input_slope(name, self.inputs['income']) * (value - old)
+
+        self.inputs[name] = value
+        if name == 'income' or self._updates >= self.RESYNC_UPDATES:
+            self._rebuild()
+        else:
+            self.logit += delta
+            self._updates += 1
+        return self
+
+    def update_many(self, changes):
+        # Apply a mapping of input name -> value; inputs that didn't change cost nothing
+        for name, value in changes.items():
+            self.update(name, value)
+        return self
+
+    def result(self):
+        # (probability, credit score, rating), as predict() returns
+        return self.scorer.score_logit(self.logit)
+
 
-# Load the model and its components
-model_data = joblib.load(MODEL_PATH)
-model = model_data['model']
-scaler = model_data['scaler']
-features = model_data['features']
-cols_to_scale = model_data['cols_to_scale']
+@functools.lru_cache(maxsize=None)
+def get_encoder():
+    # One-hot layout of the shared model's features, built once on first use
+    return CategoryEncoder(get_model_data()['features'])
+
+
+@functools.lru_cache(maxsize=None)
+def get_reduced_scaler():
+    # Built once from the shared model, in place of the full scaler on the scoring path
+    model_data = get_model_data()
+    return ReducedScaler(model_data['scaler'], model_data['cols_to_scale'], model_data['features'])
+
+
+@functools.lru_cache(maxsize=None)
+def get_scorer():
+    # Built once, on first use, from the shared model and used by predict()
+    model_data = get_model_data()
+    return CompiledScorer(model_data['model'], model_data['scaler'],
+                          model_data['features'], model_data['cols_to_scale'])
 
 
 def prepare_input(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
                     delinquency_ratio, credit_utilization_ratio, num_open_accounts, residence_type,
                     loan_purpose, loan_type):
-    # Create a dictionary with input values and dummy values for missing features
+    # Create a dictionary with the model's input values
     input_data = {
         'age': age,
         'loan_tenure_months': loan_tenure_months,
@@ -26,75 +315,170 @@ def prepare_input(age, income, loan_amount, loan_tenure_months, avg_dpd_per_deli
         'loan_to_income': loan_amount / income if income > 0 else 0,
         'delinquency_ratio': delinquency_ratio,
         'avg_dpd_per_delinquency': avg_dpd_per_delinquency,
-        'residence_type_Owned': 1 if residence_type == 'Owned' else 0,
-        'residence_type_Rented': 1 if residence_type == 'Rented' else 0,
-        'loan_purpose_Education': 1 if loan_purpose == 'Education' else 0,
-        'loan_purpose_Home': 1 if loan_purpose == 'Home' else 0,
-        'loan_purpose_Personal': 1 if loan_purpose == 'Personal' else 0,
-        'loan_type_Unsecured': 1 if loan_type == 'Unsecured' else 0,
-        # additional dummy fields just for scaling purpose
-        'number_of_dependants': 1,  # Dummy value
-        'years_at_current_address': 1,  # Dummy value
-        'zipcode': 1,  # Dummy value
-        'sanction_amount': 1,  # Dummy value
-        'processing_fee': 1,  # Dummy value
-        'gst': 1,  # Dummy value
-        'net_disbursement': 1,  # Computed dummy value
-        'principal_outstanding': 1,  # Dummy value
-        'bank_balance_at_application': 1,  # Dummy value
-        'number_of_closed_accounts': 1,  # Dummy value
-        'enquiry_count': 1  # Dummy value
     }
 
-    # Ensure all columns for features and cols_to_scale are present
-    df = pd.DataFrame([input_data])
-
-    # Ensure only required columns for scaling are scaled
-    df[cols_to_scale] = scaler.transform(df[cols_to_scale])
+    # One-hot columns for the categorical inputs; raises ValueError for unknown labels
+    encoder = get_encoder()
+    input_data.update(encoder.dummies('residence_type', residence_type))
+    input_data.update(encoder.dummies('loan_purpose', loan_purpose))
+    input_data.update(encoder.dummies('loan_type', loan_type))
 
     # Ensure the DataFrame contains only the features expected by the model
-    df = df[features]
+    df = pd.DataFrame([input_data])[get_model_data()['features']]
+
+    # Scale the feature columns the scaler was fitted on
+    scaler = get_reduced_scaler()
+    df[scaler.columns] = scaler.transform(df[scaler.columns].to_numpy())
 
     return df
 
 
+def validate_batch(data, max_errors=20):
+    # Check a DataFrame or mapping of columns against INPUT_LIMITS and INPUT_CHOICES.
+    # Returns a list of (row, column, message) for the first max_errors problems.
+    errors = []
+    for name in INPUT_COLUMNS:
+        if name not in data:
+            errors.append((None, name, 'missing column'))
+    if errors:
+        return errors
+
+    for name, (low, high) in INPUT_LIMITS.items():
+        values = pd.to_numeric(pd.Series(np.asarray(data[name], dtype=object)), errors='coerce').to_numpy(dtype=float)
+        bad = np.isnan(values)
+        if low is not None:
+            bad |= values < low
+        if high is not None:
+            bad |= values > high
+        for row in np.flatnonzero(bad)[:max_errors]:
+            errors.append((int(row), name, f"must be a number between {low} and {high if high is not None else 'inf'}"))
+
+    for name, choices in INPUT_CHOICES.items():
+        bad = ~np.isin(np.asarray(data[name], dtype=object), choices)
+        for row in np.flatnonzero(bad)[:max_errors]:
+            errors.append((int(row), name, f"must be one of {choices}"))
+
+    return errors[:max_errors]
+
+
+def prepare_input_batch(data):
+    # Scaled model features for a DataFrame, a mapping of column arrays keyed by
+    # INPUT_COLUMNS, or an ApplicantBatch
+    batch = ApplicantBatch.from_columns(data)
+    columns = {name: getattr(batch, name) for name in INPUT_COLUMNS}
+    loan_to_income = batch.loan_to_income
+
+    input_data = {
+        'age': columns['age'],
+        'loan_tenure_months': columns['loan_tenure_months'],
+        'number_of_open_accounts': columns['num_open_accounts'],
+        'credit_utilization_ratio': columns['credit_utilization_ratio'],
+        'loan_to_income': loan_to_income,
+        'delinquency_ratio': columns['delinquency_ratio'],
+        'avg_dpd_per_delinquency': columns['avg_dpd_per_delinquency'],
+    }
+
+    df = pd.DataFrame(input_data)
+
+    # All one-hot columns in one integer-indexed pass over the batch's category codes
+    encoder = get_encoder()
+    dummy_columns = [encoder.features[i] for i in encoder.dummy_columns]
+    df[dummy_columns] = encoder.one_hot(batch, len(batch))[:, encoder.dummy_columns]
+
+    # Scale every row in a single transform call
+    scaler = get_reduced_scaler()
+    df[scaler.columns] = scaler.transform(df[scaler.columns].to_numpy())
+
+    return df[get_model_data()['features']]
+
+
+@metrics.timed('predict')
 def predict(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
             delinquency_ratio, credit_utilization_ratio, num_open_accounts,
             residence_type, loan_purpose, loan_type):
-    # Prepare input data
-    input_df = prepare_input(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
-                             delinquency_ratio, credit_utilization_ratio, num_open_accounts, residence_type,
-                             loan_purpose, loan_type)
+    # Score through the compiled kernel; matches prepare_input + calculate_credit_score
+    # to within floating-point tolerance without building a DataFrame
+    return get_scorer().score(age, income, loan_amount, loan_tenure_months, avg_dpd_per_delinquency,
+                              delinquency_ratio, credit_utilization_ratio, num_open_accounts,
+                              residence_type, loan_purpose, loan_type)
 
-    probability, credit_score, rating = calculate_credit_score(input_df)
 
-    return probability, credit_score, rating
+def encode_batch(data):
+    # ApplicantBatch.from_columns, timed: categorical encoding dominates batch scoring
+    start = metrics.start_timer()
+    batch = ApplicantBatch.from_columns(data)
+    metrics.stop_timer('encode_batch', start)
+    return batch
 
 
-def calculate_credit_score(input_df, base_score=300, scale_length=600):
+@metrics.timed('predict_batch')
+def predict_batch(data):
+    # Score many applicants at once; returns arrays of probability, credit score and rating.
+    # Accepts an ApplicantBatch, a DataFrame or a mapping of column arrays keyed by INPUT_COLUMNS.
+    return get_scorer().score_batch(encode_batch(data))
+
+
+def explain_batch(data, top_n=4):
+    # predict_batch plus the top_n adverse-action reasons for every row; returns
+    # (probability, credit_score, rating, reasons, contributions)
+    return get_scorer().explain_batch(encode_batch(data), top_n)
+
+
+def describe_reasons(batch, reasons, row=0):
+    # [(code, title, advice)] for one row of explain_batch() reasons, worst first
+    described = []
+    for k in reasons[row]:
+        if k < 0:
+            break
+        code, attribute, title, advice = REASONS[k]
+        if attribute in INPUT_CHOICES:
+            value = str(batch.labels(attribute)[row])
+        else:
+            value = float(getattr(batch, attribute)[row])
+        described.append((code, title, advice.format(value=value, reference=REFERENCE_APPLICANT[attribute])))
+    return described
+
+
+def score_grid(inputs, x_name, x_values, y_name, y_values):
+    # Score the Cartesian grid of two inputs around a base applicant in one vectorized call.
+    # inputs maps INPUT_COLUMNS to scalars; returns (probability, credit_score) arrays
+    # shaped (len(y_values), len(x_values)).
+    x_grid, y_grid = np.meshgrid(np.asarray(x_values), np.asarray(y_values))
+    n_points = x_grid.size
+
+    columns = {name: np.full(n_points, inputs[name], dtype=object if name in INPUT_CHOICES else float)
+               for name in INPUT_COLUMNS}
+    columns[x_name] = x_grid.ravel()
+    columns[y_name] = y_grid.ravel()
+
+    probability, credit_score, _ = predict_batch(columns)
+
+    return probability.reshape(x_grid.shape), credit_score.reshape(x_grid.shape)
+
+
+def calculate_credit_scores(input_df, base_score=300, scale_length=600):
+    model = get_model_data()['model']
     x = np.dot(input_df.values, model.coef_.T) + model.intercept_
 
+    return credit_scores_from_logits(x.flatten(), base_score, scale_length)
+
+
+def credit_scores_from_logits(x, base_score=300, scale_length=600):
     # Apply the logistic function to calculate the probability
     default_probability = 1 / (1 + np.exp(-x))
 
     non_default_probability = 1 - default_probability
 
     # Convert the probability to a credit score, scaled to fit within 300 to 900
-    credit_score = base_score + non_default_probability.flatten() * scale_length
+    credit_score = base_score + non_default_probability * scale_length
 
     # Determine the rating category based on the credit score
-    def get_rating(score):
-        if 300 <= score < 500:
-            return 'Poor'
-        elif 500 <= score < 650:
-            return 'Average'
-        elif 650 <= score < 750:
-            return 'Good'
-        elif 750 <= score <= 900:
-            return 'Excellent'
-        else:
-            return 'Undefined'  # in case of any unexpected score
+    rating = rate_scores(credit_score)
+
+    return default_probability, credit_score.astype(int), rating
 
-    rating = get_rating(credit_score[0])
 
-    return default_probability.flatten()[0], int(credit_score[0]), rating
\ No newline at end of file
+def calculate_credit_score(input_df, base_score=300, scale_length=600):
+    default_probability, credit_score, rating = calculate_credit_scores(input_df, base_score, scale_length)
+
+    return default_probability[0], int(credit_score[0]), str(rating[0])
\ No newline at end of file
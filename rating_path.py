@@ -0,0 +1,177 @@
+import math
+
+import numpy as np
+
+from applicant_batch import ApplicantBatch, INPUT_COLUMNS
+from prediction_helper import get_scorer
+from ratings import RATING_EDGES, RATINGS, get_rating
+
+# "Path to the next rating": the smallest slider changes that lift an applicant into the next
+# rating band. The default log-odds are linear in every numeric input (loan_amount through
+# loan_to_income, for a fixed income), so each band edge is a half-space in input space:
+#
+#   - for a single input, the required value is solved for directly;
+#   - for a combined change, minimizing the total movement (each input's change as a fraction
+#     of its slider range) over the slider grids is a small integer program, solved exactly:
+#     every combination of the other sliders' values is enumerated in one vectorized pass,
+#     and the slider with the most grid steps is solved in closed form for each of them.
+#
+# Results are snapped to the slider grid and confirmed on the exact scorer.
+
+# Candidates confirmed on the exact scorer per batch, cheapest first, for the combined path
+CONFIRM_BATCH = 256
+
+
+def logit_for_score(score, base_score=300, scale_length=600):
+    # Default log-odds at which the credit score equals score (score is decreasing in the logit)
+    default_probability = 1 - (score - base_score) / scale_length
+    return math.log(default_probability / (1 - default_probability))
+
+
+def next_band_edge(credit_score):
+    # Lower edge of the rating band above credit_score, or None if already in the top band
+    rating = get_rating(credit_score)
+    if rating not in RATINGS or rating == RATINGS[-1]:
+        return None
+    return RATING_EDGES[RATINGS.index(rating) + 1]
+
+
+def input_slopes(inputs, names):
+    # d(logit)/d(input) for each numeric input name, at the applicant's income
+    scorer = get_scorer()
+    return {name: scorer.input_slope(name, inputs['income']) for name in names}
+
+
+def _snap(value, low, high, step, slope):
+    # Round value onto the slider grid low, low + step, ... in the direction that lowers the logit
+    steps = (value - low) / step
+    steps = math.floor(steps + 1e-9) if slope > 0 else math.ceil(steps - 1e-9)
+    return min(max(low + steps * step, low), high)
+
+
+def _score_candidates(inputs, candidates):
+    # Credit scores of several modified applicants, scored in one batch
+    columns = {name: [candidate.get(name, inputs[name]) for candidate in candidates] for name in INPUT_COLUMNS}
+    return get_scorer().score_batch(ApplicantBatch.from_columns(columns))[1]
+
+
+def _logit(inputs):
+    batch = ApplicantBatch.from_columns({name: [inputs[name]] for name in INPUT_COLUMNS})
+    return float(get_scorer().logits(batch)[0])
+
+
+def single_input_paths(inputs, dimensions, target_score):
+    # For each slider, the nearest value on its grid that reaches target_score on its own,
+    # or None if no value within the slider's range does. dimensions maps input name to
+    # (min, max, step); inputs maps INPUT_COLUMNS to the current values.
+    required = _logit(inputs) - logit_for_score(target_score)
+    if required <= 0:
+        return {name: inputs[name] for name in dimensions}
+    slopes = input_slopes(inputs, dimensions)
+
+    paths = {}
+    for name, (low, high, step) in dimensions.items():
+        slope = slopes[name]
+        if slope == 0:
+            paths[name] = None
+            continue
+        paths[name] = _snap(inputs[name] - required / slope, low, high, step, slope)
+
+    # Confirm on the exact scorer; truncation at the band edge can need one more step
+    names = [name for name, value in paths.items() if value is not None]
+    scores = _score_candidates(inputs, [{name: paths[name]} for name in names])
+    for name, score in zip(names, scores):
+        if score < target_score:
+            low, high, step = dimensions[name]
+            value = paths[name] - step if slopes[name] > 0 else paths[name] + step
+            ok = low <= value <= high and _score_candidates(inputs, [{name: value}])[0] >= target_score
+            paths[name] = value if ok else None
+    return paths
+
+
+def _improving_values(current, low, high, step, slope):
+    # current, then the slider grid values from it to the bound in the direction that lowers
+    # the logit; moving the other way only adds cost
+    grid = low + step * np.arange(int(round((high - low) / step)) + 1)
+    if slope > 0:
+        better = grid[grid < current][::-1]
+    elif slope < 0:
+        better = grid[grid > current]
+    else:
+        better = grid[:0]
+    return np.concatenate(([current], better)).astype(float)
+
+
+def _plain(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def cheapest_path(inputs, dimensions, target_score):
+    # The combined slider change with the least total movement (sum of |change| / slider
+    # range) that reaches target_score, as {name: new value} for the sliders that move;
+    # None if target_score is out of reach within the slider bounds.
+    target_logit = logit_for_score(target_score)
+    logit = _logit(inputs)
+    if logit <= target_logit:
+        return {}
+    slopes = input_slopes(inputs, dimensions)
+    names = [name for name, (low, high, _) in dimensions.items() if high > low]
+    if not names:
+        return None
+
+    # Enumerate every combination of all sliders but the finest, from their current value
+    # towards their better bound
+    solved = max(names, key=lambda name: (dimensions[name][1] - dimensions[name][0]) / dimensions[name][2])
+    enumerated = [name for name in names if name != solved]
+    axes = [_improving_values(inputs[name], *dimensions[name], slopes[name]) for name in enumerated]
+    grid = [axis.ravel() for axis in np.meshgrid(*axes, indexing='ij')] if axes else []
+    gained = np.zeros(len(grid[0]) if grid else 1)
+    cost = np.zeros_like(gained)
+    for name, values in zip(enumerated, grid):
+        low, high, _ = dimensions[name]
+        gained += slopes[name] * (values - inputs[name])
+        cost += np.abs(values - inputs[name]) / (high - low)
+
+    # The finest slider then needs to cover the rest of the distance to the band edge, which
+    # the logit's linearity gives in closed form. Its grid value one step either side is
+    # also kept, so rounding at the band edge can't exclude the true optimum.
+    low, high, step = dimensions[solved]
+    current, slope = inputs[solved], slopes[solved]
+    remaining = logit + gained - target_logit
+    if slope == 0:
+        values = np.full_like(remaining, current)
+        shifts = (0,)
+    else:
+        exact = current - np.maximum(remaining, 0) / slope
+        steps = (exact - low) / step
+        steps = np.floor(steps + 1e-9) if slope > 0 else np.ceil(steps - 1e-9)
+        values = np.where(remaining > 0, low + steps * step, current)
+        shifts = (0, -np.sign(slope) * step, np.sign(slope) * step)
+
+    candidates, costs, rows = [], [], []
+    for shift in shifts:
+        shifted = values + shift
+        # Only values between the current one and the better bound
+        keep = (low <= shifted) & (shifted <= high) & (slope * (shifted - current) <= 0)
+        candidates.append(shifted[keep])
+        costs.append(cost[keep] + np.abs(shifted[keep] - current) / (high - low))
+        rows.append(np.flatnonzero(keep))
+    candidates, costs, rows = np.concatenate(candidates), np.concatenate(costs), np.concatenate(rows)
+
+    # Confirm on the exact scorer, cheapest first; the linear estimate only orders them
+    order = np.argsort(costs, kind='stable')
+    for start in range(0, len(order), CONFIRM_BATCH):
+        batch = order[start:start + CONFIRM_BATCH]
+        changes = {solved: candidates[batch]}
+        for name, values in zip(enumerated, grid):
+            changes[name] = values[rows[batch]]
+        columns = {name: changes[name] if name in changes else np.full(len(batch), inputs[name], dtype=object)
+                   for name in INPUT_COLUMNS}
+        scores = get_scorer().score_batch(ApplicantBatch.from_columns(columns))[1]
+        reached = np.flatnonzero(scores >= target_score)
+        if len(reached):
+            best = reached[0]
+            return {name: _plain(changes[name][best]) for name in names
+                    if not np.isclose(changes[name][best], inputs[name])}
+    return None
@@ -0,0 +1,52 @@
+import numpy as np
+
+# Credit score rating bands: [300, 500) Poor, [500, 650) Average, [650, 750) Good and
+# [750, 900] Excellent. Scores outside [300, 900] get code -1, 'Undefined'.
+RATING_EDGES = (300, 500, 650, 750, 900)
+RATINGS = ('Poor', 'Average', 'Good', 'Excellent')
+UNDEFINED = 'Undefined'
+
+# (text color, background color) per rating, shared by every page that colors a score
+RATING_COLORS = {
+    'Excellent': ('#00aa00', '#00ff0050'),
+    'Good': ('#88aa00', '#ffff0050'),
+    'Average': ('#ffaa00', '#ffaa0050'),
+    'Poor': ('#ff4444', '#ff666650'),
+    UNDEFINED: ('#000000', '#ffffff50'),
+}
+
+
+def rating_codes(scores, edges=RATING_EDGES):
+    # int8 band index of each score (0 = lowest band), in one binary search over the edges.
+    # Bands are closed on the left; the top edge is closed too. Out-of-range scores get -1.
+    scores = np.asarray(scores, dtype=float)
+    edges = np.asarray(edges, dtype=float)
+    n_bands = len(edges) - 1
+    codes = np.searchsorted(edges, scores, side='right') - 1
+    codes = np.where(scores == edges[-1], n_bands - 1, codes)
+    codes = np.where((codes >= n_bands) | np.isnan(scores), -1, codes)
+    return codes.astype(np.int8)
+
+
+def rating_labels(codes, labels=RATINGS):
+    # Object array of labels for rating codes; -1 maps to 'Undefined'
+    return np.asarray(tuple(labels) + (UNDEFINED,), dtype=object)[np.asarray(codes)]
+
+
+def rate_scores(scores, edges=RATING_EDGES, labels=RATINGS):
+    return rating_labels(rating_codes(scores, edges), labels)
+
+
+def get_rating(score, edges=RATING_EDGES, labels=RATINGS):
+    # Rating of a single score
+    if edges[0] <= score <= edges[-1]:
+        for label, upper in zip(labels, edges[1:]):
+            if score < upper:
+                return label
+        return labels[-1]
+    return UNDEFINED
+
+
+def rating_color(score):
+    # (text color, background color) for a single score
+    return RATING_COLORS[get_rating(score)]
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Adverse-action reasons, one per model input, in the column order of the contribution
+# matrix returned by CompiledScorer.contributions(). Each entry is
+# (code, ApplicantBatch attribute, title, advice); advice is formatted with the applicant's
+# value and the REFERENCE_APPLICANT value it is compared against. Every numeric input
+# raises risk as it grows, so a reported numeric reason always has value > reference.
+REASONS = [
+    ('R01', 'loan_to_income', 'High Loan-to-Income Ratio',
+     "Your loan amount is {value:.1f}x your yearly income, above the {reference:g}x benchmark. "
+     "Consider reducing your loan amount or increasing your income before applying."),
+    ('R02', 'credit_utilization_ratio', 'High Credit Utilization',
+     "Your credit utilization ratio of {value:g}% is above the {reference:g}% benchmark. "
+     "Reducing it would improve your credit score."),
+    ('R03', 'delinquency_ratio', 'Elevated Delinquency Ratio',
+     "Your delinquency ratio of {value:g}% is above the {reference:g}% benchmark, reflecting late payments. "
+     "Focus on making timely payments for at least 6-12 months to improve this metric."),
+    ('R04', 'avg_dpd_per_delinquency', 'High Days Past Due',
+     "Your average DPD of {value:g} days is above the {reference:g}-day benchmark. "
+     "Setting up automatic payments could help ensure you pay on time."),
+    ('R05', 'num_open_accounts', 'Multiple Open Accounts',
+     "Having {value:g} open loan accounts, more than the benchmark of {reference:g}, may be seen as a risk. "
+     "Consider paying off some smaller loans before applying for new credit."),
+    ('R06', 'loan_tenure_months', 'Long Loan Tenure',
+     "A {value:g}-month tenure is longer than the {reference:g}-month benchmark and adds risk. "
+     "A shorter tenure would lower your default probability."),
+    ('R07', 'age', 'Applicant Age',
+     "Your age of {value:g}, above the benchmark of {reference:g}, slightly increases the estimated risk."),
+    ('R08', 'residence_type', 'Residence Type',
+     "{value} residence is associated with higher default risk than {reference} residence."),
+    ('R09', 'loan_purpose', 'Loan Purpose',
+     "{value} loans carry higher default risk than {reference} loans."),
+    ('R10', 'loan_type', 'Unsecured Loan',
+     "{value} loans carry more risk than {reference} loans. Offering collateral could improve your assessment."),
+]
+REASON_CODES = np.array([code for code, _, _, _ in REASONS], dtype=object)
+
+# The applicant contributions are measured against, keyed like REASONS: the main page's
+# former warning thresholds, with utilization and delinquency tightened so the applicant
+# scores 757, just inside the top rating band, and the model's baseline category levels.
+# Anyone rated below the top band is worse than this applicant on at least one input.
+REFERENCE_APPLICANT = {
+    'loan_to_income': 2.0,
+    'credit_utilization_ratio': 40,
+    'delinquency_ratio': 15,
+    'avg_dpd_per_delinquency': 15,
+    'num_open_accounts': 3,
+    'loan_tenure_months': 36,
+    'age': 35,
+    'residence_type': 'Mortgage',
+    'loan_purpose': 'Auto',
+    'loan_type': 'Secured',
+}
+
+# Contributions below this many logit units (odds multiplied by less than ~1.1) aren't
+# reported, apart from the largest one
+MIN_CONTRIBUTION = 0.1
+
+
+def top_reasons(contributions, top_n=4, min_contribution=MIN_CONTRIBUTION):
+    # (n, top_n) int8 indices into REASONS, largest adverse contribution first, for an
+    # (n, len(REASONS)) contribution matrix. The largest is reported whenever it is
+    # positive, the rest only from min_contribution up; other slots are -1.
+    top_n = min(top_n, contributions.shape[1])
+    order = np.argsort(-contributions, axis=1)[:, :top_n]
+    reasons = order.astype(np.int8)
+    ranked = np.take_along_axis(contributions, order, axis=1)
+    reasons[ranked < min_contribution] = -1
+    reasons[:, 0] = np.where(ranked[:, 0] > 0, order[:, 0], -1)
+    return reasons
+
+
+def reason_code_strings(reasons, separator=';'):
+    # One string per row, e.g. 'R02;R03', from top_reasons() output
+    labels = np.append(REASON_CODES, '')[reasons]
+    joined = labels[:, 0].copy()
+    # Unused slots (-1) only ever trail the used ones
+    for k in range(1, labels.shape[1]):
+        joined = joined + np.where(labels[:, k] != '', separator + labels[:, k], '')
+    return joined
@@ -0,0 +1,214 @@
+import os
+import json
+import hashlib
+import argparse
+import functools
+
+import numpy as np
+import pandas as pd
+
+from density import CLASSES, density_curves
+from model_registry import ARTIFACTS_DIR, shared_model_path
+
+# Compact per-feature, per-class reference distributions (histograms, KDE grids and quantiles)
+# used by the feature distribution page. Built once with:
+#
+#   python reference_data.py
+#
+# and stored as .npy files so every process can memory-map them read-only.
+REFERENCE_DIR = os.path.join(ARTIFACTS_DIR, 'reference_distributions')
+
+# Features shown on the distribution page; discrete ones are histogrammed with these bins
+DISTRIBUTION_FEATURES = ["age", "loan_to_income_ratio", "loan_tenure_months",
+                         "credit_utilization_ratio", "delinquency_ratio",
+                         "avg_dpd_per_delinquency", "num_open_accounts"]
+DISCRETE_BINS = {"num_open_accounts": range(0, 6)}
+HISTOGRAM_BINS = 30
+QUANTILE_LEVELS = [0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99]
+
+# Function to create synthetic data for demonstration
+def create_synthetic_data():
+    # Set random seed for reproducibility
+    np.random.seed(42)
+    
+    # Number of samples
+    n_samples = 1000
+    
+    # Create dataframe with random data following specific distributions
+    df = pd.DataFrame()
+    
+    # Age: defaulters tend to be younger
+    df['age'] = np.concatenate([
+        np.random.normal(35, 10, int(n_samples * 0.7)),  # non-defaulters
+        np.random.normal(28, 8, int(n_samples * 0.3))    # defaulters
+    ])
+    
+    # Loan to Income Ratio: defaulters have higher ratios
+    df['loan_to_income_ratio'] = np.concatenate([
+        np.random.beta(2, 5, int(n_samples * 0.7)) * 3,   # non-defaulters
+        np.random.beta(4, 3, int(n_samples * 0.3)) * 3    # defaulters
+    ])
+    
+    # Loan Tenure: bimodal for defaulters
+    df['loan_tenure_months'] = np.concatenate([
+        np.random.normal(36, 8, int(n_samples * 0.7)),    # non-defaulters
+        np.concatenate([                                   # defaulters (bimodal)
+            np.random.normal(24, 5, int(n_samples * 0.15)),
+            np.random.normal(48, 5, int(n_samples * 0.15))
+        ])
+    ])
+    
+    # Average DPD: higher for defaulters
+    df['avg_dpd_per_delinquency'] = np.concatenate([
+        np.random.exponential(5, int(n_samples * 0.7)),   # non-defaulters
+        np.random.exponential(15, int(n_samples * 0.3))   # defaulters
+    ])
+    
+    # Delinquency Ratio: non-defaulters concentrated near 0
+    df['delinquency_ratio'] = np.concatenate([
+        np.random.beta(1, 8, int(n_samples * 0.7)) * 100,   # non-defaulters
+        np.random.beta(2, 2, int(n_samples * 0.3)) * 100    # defaulters
+    ])
+    
+    # Credit Utilization Ratio
+    df['credit_utilization_ratio'] = np.concatenate([
+        np.random.beta(2, 3, int(n_samples * 0.7)) * 100,   # non-defaulters
+        np.random.beta(4, 2, int(n_samples * 0.3)) * 100    # defaulters
+    ])
+    
+    # Number of Open Accounts: discrete
+    df['num_open_accounts'] = np.concatenate([
+        np.random.choice([1, 2, 3, 4], int(n_samples * 0.7), p=[0.15, 0.5, 0.25, 0.1]),  # non-defaulters
+        np.random.choice([1, 2, 3, 4], int(n_samples * 0.3), p=[0.3, 0.3, 0.3, 0.1])      # defaulters
+    ])
+    
+    # Default status
+    df['default'] = np.concatenate([
+        np.zeros(int(n_samples * 0.7)),  # non-defaulters
+        np.ones(int(n_samples * 0.3))    # defaulters
+    ])
+    
+    return df
+
+
+def dataset_fingerprint(df):
+    # Stable digest of a DataFrame's contents, used to key anything derived from it
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(row_hashes.tobytes() + ','.join(map(str, df.columns)).encode()).hexdigest()[:16]
+
+
+def build_reference(df, source):
+    # Summarize df (feature columns plus a 0/1 'default' column) into fixed-shape arrays.
+    # Histograms are NaN/zero padded to the widest feature; meta['hist_bins'] has the real sizes.
+    curves = density_curves(df, DISTRIBUTION_FEATURES, DISCRETE_BINS)
+    class_names = list(CLASSES.values())
+
+    edges_per_feature = []
+    for feature in DISTRIBUTION_FEATURES:
+        if feature in DISCRETE_BINS:
+            edges_per_feature.append(np.asarray(DISCRETE_BINS[feature], dtype=float))
+        else:
+            edges_per_feature.append(np.histogram_bin_edges(df[feature].to_numpy(dtype=float), bins=HISTOGRAM_BINS))
+    max_bins = max(len(edges) - 1 for edges in edges_per_feature)
+
+    n_features, n_classes = len(DISTRIBUTION_FEATURES), len(class_names)
+    gridsize = len(curves[DISTRIBUTION_FEATURES[0]]['grid'])
+    arrays = {
+        'kde_grid': np.zeros((n_features, gridsize)),
+        'kde_density': np.zeros((n_features, n_classes, gridsize)),
+        'hist_edges': np.full((n_features, max_bins + 1), np.nan),
+        'hist_counts': np.zeros((n_features, n_classes, max_bins), dtype=np.int64),
+        'quantiles': np.zeros((n_features, n_classes, len(QUANTILE_LEVELS))),
+    }
+
+    for i, feature in enumerate(DISTRIBUTION_FEATURES):
+        curve = curves[feature]
+        edges = edges_per_feature[i]
+        arrays['kde_grid'][i] = curve['grid']
+        arrays['hist_edges'][i, :len(edges)] = edges
+        for j, (label, name) in enumerate(CLASSES.items()):
+            values = df.loc[df['default'] == label, feature].to_numpy(dtype=float)
+            arrays['kde_density'][i, j] = curve[name]
+            arrays['hist_counts'][i, j, :len(edges) - 1] = np.histogram(values, bins=edges)[0]
+            arrays['quantiles'][i, j] = np.quantile(values, QUANTILE_LEVELS)
+
+    meta = {
+        'source': source,
+        'features': DISTRIBUTION_FEATURES,
+        'classes': class_names,
+        'class_counts': [int((df['default'] == label).sum()) for label in CLASSES],
+        'discrete_features': list(DISCRETE_BINS),
+        'hist_bins': [len(edges) - 1 for edges in edges_per_feature],
+        'quantile_levels': QUANTILE_LEVELS,
+        'fingerprint': dataset_fingerprint(df),
+    }
+    return arrays, meta
+
+
+def write_reference(arrays, meta, out_dir=REFERENCE_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f'{name}.npy'), np.ascontiguousarray(array))
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+@functools.lru_cache(maxsize=None)
+def load_reference(path=None):
+    if path is None:
+        # Workers in shared mode read the distributions from the shared model file
+        if shared_model_path():
+            from shared_model import load_shared_reference
+            return load_shared_reference(shared_model_path())
+        path = REFERENCE_DIR
+
+    # Memory-map the reference arrays read-only; one mapping per process, shared by all sessions.
+    # Falls back to summarizing the synthetic data in memory if the artifact hasn't been built.
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        arrays, meta = build_reference(create_synthetic_data(), source='synthetic (in-memory, artifact not built)')
+        return arrays, meta
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+              for name in ('kde_grid', 'kde_density', 'hist_edges', 'hist_counts', 'quantiles')}
+    return arrays, meta
+
+
+def reference_curves(arrays, meta):
+    # Views of the reference arrays in the {feature: curve} layout of density.density_curves
+    curves = {}
+    for i, feature in enumerate(meta['features']):
+        curve = {'grid': arrays['kde_grid'][i]}
+        for j, name in enumerate(meta['classes']):
+            curve[name] = arrays['kde_density'][i, j]
+        if feature in meta['discrete_features']:
+            n_bins = meta['hist_bins'][i]
+            curve['bins'] = arrays['hist_edges'][i, :n_bins + 1]
+            for j, name in enumerate(meta['classes']):
+                curve[f'{name}_counts'] = arrays['hist_counts'][i, j, :n_bins]
+        curves[feature] = curve
+    return curves
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the reference-distribution artifact')
+    parser.add_argument('--data', help='CSV of training data with the distribution features and a default column '
+                                       '(default: synthetic demonstration data)')
+    parser.add_argument('--out', default=REFERENCE_DIR, help='output directory')
+    args = parser.parse_args()
+
+    if args.data:
+        df, source = pd.read_csv(args.data), os.path.basename(args.data)
+    else:
+        df, source = create_synthetic_data(), 'synthetic'
+
+    arrays, meta = build_reference(df, source)
+    write_reference(arrays, meta, args.out)
+    size = sum(os.path.getsize(os.path.join(args.out, f)) for f in os.listdir(args.out))
+    print(f"Wrote {len(arrays)} arrays for {len(meta['features'])} features to {args.out} ({size / 1024:.1f} KB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from amortization import affordability, calculate_emi
+from model_registry import get_model_data
+from prediction_helper import INPUT_CHOICES, INPUT_COLUMNS, explain_batch, predict_batch, validate_batch
+from reason_codes import reason_code_strings
+
+# Score a CSV or Parquet file of applications in fixed-size chunks:
+#
+#   python score_file.py applications.csv scored.csv --chunk-size 100000 --workers 4
+#
+# Input columns are named like the predict() arguments (see INPUT_COLUMNS). The output
+# keeps the input columns and adds probability, credit_score and rating. If the input has an
+# interest_rate column (annual %, 0-100), emi and emi_income_percentage are added as well. With
+# --reasons N, a reason_codes column lists up to N adverse-action codes per row, e.g. 'R02;R03'.
+
+
+# Valid annual interest rates (%) in the optional interest_rate column
+INTEREST_RATE_LIMITS = (0, 100)
+
+# Output column types. Parquet output is written with this schema from the first chunk on,
+# so a later chunk whose dtypes pandas infers differently (say int -> float once NaNs show
+# up) still fits; other pass-through columns are pinned from the first chunk, with
+# integers widened to float64 for the same reason.
+OUTPUT_TYPES = {
+    **{name: 'string' if name in INPUT_CHOICES else 'float64' for name in INPUT_COLUMNS},
+    'interest_rate': 'float64',
+    'probability': 'float64',
+    'credit_score': 'int64',
+    'rating': 'string',
+    'reason_codes': 'string',
+    'emi': 'float64',
+    'emi_income_percentage': 'float64',
+}
+
+
+def file_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.parquet', '.pq'):
+        return 'parquet'
+    if ext in ('.csv', '.txt') or path.endswith('.csv.gz'):
+        return 'csv'
+    raise SystemExit(f"Unsupported file type for {path}; use .csv or .parquet")
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Parquet support needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def read_chunks(source, chunk_size, fmt=None):
+    # Yield DataFrames of at most chunk_size rows without reading the whole file.
+    # source is a path or a binary file object (then fmt, 'csv' or 'parquet', is required).
+    if (fmt or file_format(source)) == 'parquet':
+        pa = import_pyarrow()
+        for batch in pa.parquet.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size)
+
+
+def output_schema(df):
+    # The pinned Parquet schema for scored chunks shaped like df (see OUTPUT_TYPES)
+    pa = import_pyarrow()
+    types = {'float64': pa.float64(), 'int64': pa.int64(), 'string': pa.string()}
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in inferred:
+        if field.name in OUTPUT_TYPES:
+            field = pa.field(field.name, types[OUTPUT_TYPES[field.name]])
+        elif pa.types.is_integer(field.type) or pa.types.is_null(field.type):
+            field = pa.field(field.name, pa.float64())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+class ChunkWriter:
+    # Append scored chunks to a CSV or Parquet file as they arrive
+
+    def __init__(self, path):
+        self.path = path
+        self.format = file_format(path)
+        self._writer = None
+        self._first = True
+
+    def write(self, df):
+        if self.format == 'parquet':
+            pa = import_pyarrow()
+            if self._writer is None:
+                self._writer = pa.parquet.ParquetWriter(self.path, output_schema(df))
+            table = pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='w' if self._first else 'a', header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def validate_interest_rate(df, max_errors=20):
+    # (row, column, message) problems in an optional interest_rate column, like validate_batch
+    if 'interest_rate' not in df:
+        return []
+    low, high = INTEREST_RATE_LIMITS
+    values = pd.to_numeric(df['interest_rate'], errors='coerce').to_numpy(dtype=float)
+    bad = np.isnan(values) | (values < low) | (values > high)
+    return [(int(row), 'interest_rate', f"must be a number between {low} and {high}")
+            for row in np.flatnonzero(bad)[:max_errors]]
+
+
+def score_chunk(df, offset=0, reasons=0):
+    errors = validate_batch(df) + validate_interest_rate(df)
+    if errors:
+        row, column, message = errors[0]
+        where = f"row {offset + row}" if row is not None else "input"
+        raise ValueError(f"Invalid {where}, column {column}: {message} ({len(errors)} problem(s) in chunk)")
+
+    if reasons > 0:
+        probability, credit_score, rating, top, _ = explain_batch(df, reasons)
+    else:
+        probability, credit_score, rating = predict_batch(df)
+
+    df = df.copy()
+    df['probability'] = probability
+    df['credit_score'] = credit_score
+    df['rating'] = rating
+    if reasons > 0:
+        df['reason_codes'] = reason_code_strings(top)
+    if 'interest_rate' in df:
+        df['emi'] = calculate_emi(df['loan_amount'].to_numpy(), df['interest_rate'].to_numpy(),
+                                  df['loan_tenure_months'].to_numpy())
+        df['emi_income_percentage'] = affordability(df['emi'].to_numpy(), df['income'].to_numpy())
+    return df
+
+
+def score_file(input_path, output_path, chunk_size=100000, workers=1, reasons=0):
+    writer = ChunkWriter(output_path)
+    n_rows = 0
+    start = time.perf_counter()
+
+    try:
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                writer.write(score_chunk(chunk, n_rows, reasons))
+                n_rows += len(chunk)
+        else:
+            # Keep a bounded number of chunks in flight so memory stays flat,
+            # and write results back in input order
+            with ProcessPoolExecutor(max_workers=workers, initializer=get_model_data) as pool:
+                pending = deque()
+                offset = 0
+                for chunk in read_chunks(input_path, chunk_size):
+                    pending.append(pool.submit(score_chunk, chunk, offset, reasons))
+                    offset += len(chunk)
+                    if len(pending) >= 2 * workers:
+                        scored = pending.popleft().result()
+                        writer.write(scored)
+                        n_rows += len(scored)
+                while pending:
+                    scored = pending.popleft().result()
+                    writer.write(scored)
+                    n_rows += len(scored)
+    finally:
+        writer.close()
+
+    return n_rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Score a CSV or Parquet file of loan applications')
+    parser.add_argument('input', help='input .csv or .parquet file')
+    parser.add_argument('output', help='output .csv or .parquet file')
+    parser.add_argument('--chunk-size', type=int, default=100000, help='rows read and scored per chunk')
+    parser.add_argument('--workers', type=int, default=1, help='processes to fan chunks out over')
+    parser.add_argument('--reasons', type=int, default=0, help='add up to this many reason codes per row')
+    args = parser.parse_args(argv)
+
+    try:
+        n_rows, elapsed = score_file(args.input, args.output, args.chunk_size, args.workers, args.reasons)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    rate = n_rows / elapsed if elapsed > 0 else float('inf')
+    print(f"Scored {n_rows:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s) "
+          f"with {args.workers} worker(s), chunk size {args.chunk_size:,} -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import sys
+import json
+import argparse
+import functools
+
+import numpy as np
+import pandas as pd
+
+from ratings import RATING_EDGES, RATINGS, rate_scores
+
+# Score <-> default probability lookup, for "what PD does score X mean" and "what score
+# cutoff keeps PD <= p" without calling the model. The credit score is
+# int(base_score + (1 - PD) * scale_length), so each integer score covers a closed range
+# of PDs, and the table holds those ranges for every score from base_score to
+# base_score + scale_length:
+#
+#   python score_table.py score_table.csv            # one row per score
+#   python score_table.py bands.json --bands         # one row per rating band
+#
+# The range edges are the exact float64 PDs at which the score changes, found by binary
+# search on the same expression credit_scores_from_logits evaluates, so PD -> score through
+# the table matches the model's scores bit for bit.
+#
+# Rating bands sit at the same fractions of the score range as RATING_EDGES do on the
+# default 300-900 scale, so a table for another scale rates its scores consistently.
+
+
+def _scores_of(probability, base_score, scale_length):
+    # The credit score mapping of prediction_helper.credit_scores_from_logits
+    return (base_score + (1 - probability) * scale_length).astype(int)
+
+
+def _highest_pd(scores, base_score, scale_length):
+    # For each score s, the largest float64 PD in [0, 1] whose credit score is at least s,
+    # or -1 where no PD reaches s. The mapping is non-increasing in PD, and non-negative
+    # float64s order like their bit patterns, so this is a binary search over the bit
+    # patterns: 63 vectorized steps for all scores at once.
+    def reaches(bits):
+        return _scores_of(bits.view(np.float64), base_score, scale_length) >= scores
+
+    low = np.zeros(len(scores), dtype=np.int64)
+    high = np.full(len(scores), np.float64(1.0).view(np.int64))
+    reachable = reaches(low)
+    while (low < high).any():
+        middle = low + (high - low + 1) // 2
+        reached = reaches(middle)
+        low = np.where(reached, middle, low)
+        high = np.where(reached, high, middle - 1)
+    return np.where(reachable, low.view(np.float64), -1.0)
+
+
+def scaled_edges(base_score, scale_length, edges=RATING_EDGES):
+    # edges, defined on the default scale, moved proportionally onto
+    # [base_score, base_score + scale_length] and rounded to whole scores
+    low, high = edges[0], edges[-1]
+    return tuple(base_score + round((edge - low) * scale_length / (high - low)) for edge in edges)
+
+
+class ScoreTable:
+    # max_pd[i] and min_pd[i] bound the PDs that get credit score scores[i], inclusive.
+    # Scores are ascending, so max_pd is descending.
+
+    def __init__(self, base_score=300, scale_length=600):
+        edges = scaled_edges(base_score, scale_length)
+        if any(low >= high for low, high in zip(edges[:-1], edges[1:])):
+            raise ValueError(f"scale_length {scale_length} is too short to give every rating band a score")
+        self.base_score = base_score
+        self.scale_length = scale_length
+        self.scores = np.arange(base_score, base_score + scale_length + 1)
+
+        # highest[i]: the largest PD scoring at least scores[i]; one past the top score is
+        # the sentinel that no PD reaches
+        highest = _highest_pd(np.append(self.scores, self.scores[-1] + 1), base_score, scale_length)
+        self.max_pd = highest[:-1]
+        self.min_pd = np.where(highest[1:] < 0, 0.0, np.nextafter(highest[1:], 2.0))
+        self.edges = edges
+        self.ratings = rate_scores(self.scores, self.edges)
+
+    def score_for_pd(self, probability):
+        # Credit score of each PD in O(1): the real-number mapping finds the row to within
+        # one, and that row's exact PD range settles it
+        probability = np.asarray(probability, dtype=float)
+        last = len(self.scores) - 1
+        row = np.clip(np.floor((1 - probability) * self.scale_length), 0, last).astype(int)
+        row = np.maximum(row - (probability > self.max_pd[row]), 0)
+        row = np.minimum(row + (probability < self.min_pd[row]), last)
+        scores = self.scores[row]
+        return scores if scores.ndim else int(scores)
+
+    def pd_range(self, score):
+        # (min_pd, max_pd) of a credit score
+        try:
+            valid = float(score) == int(score)
+        except (TypeError, ValueError, OverflowError):
+            valid = False
+        if not valid or not self.scores[0] <= int(score) <= self.scores[-1]:
+            raise ValueError(f"score must be a whole number between {self.scores[0]} and "
+                             f"{self.scores[-1]}, got {score!r}")
+        i = int(score) - self.base_score
+        return float(self.min_pd[i]), float(self.max_pd[i])
+
+    def cutoff_for_pd(self, max_probability):
+        # Lowest credit score at or above which every applicant's PD is <= max_probability;
+        # None if even the top score allows a higher PD. Binary search over max_pd.
+        i = np.searchsorted(-self.max_pd, -max_probability, side='left')
+        return int(self.scores[i]) if i < len(self.scores) else None
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'credit_score': self.scores,
+            'rating': self.ratings,
+            'min_pd': self.min_pd,
+            'max_pd': self.max_pd,
+        })
+
+    def bands(self, edges=None, labels=RATINGS):
+        # One row per rating band: its score range and the PDs it covers. edges defaults
+        # to this table's scaled rating edges.
+        edges = self.edges if edges is None else edges
+        rows = []
+        for label, low, high in zip(labels, edges[:-1], edges[1:]):
+            # Bands are closed on the left; only the top band includes its upper edge
+            top = high if high == edges[-1] else high - 1
+            rows.append({
+                'rating': label,
+                'min_score': int(low),
+                'max_score': int(top),
+                'min_pd': self.pd_range(top)[0],
+                'max_pd': self.pd_range(low)[1],
+            })
+        return pd.DataFrame(rows)
+
+    def export(self, path, bands=False):
+        # Write the table (or the band summary) as .csv or .json; PDs keep full precision
+        df = self.bands() if bands else self.to_frame()
+        if path.lower().endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'base_score': self.base_score, 'scale_length': self.scale_length,
+                           'rows': df.to_dict(orient='records')}, f, indent=1)
+        else:
+            df.to_csv(path, index=False, float_format='%.17g')
+
+
+@functools.lru_cache(maxsize=None)
+def get_score_table(base_score=300, scale_length=600):
+    return ScoreTable(base_score, scale_length)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the credit score <-> default probability table')
+    parser.add_argument('output', help='output .csv or .json file')
+    parser.add_argument('--bands', action='store_true', help='one row per rating band instead of per score')
+    parser.add_argument('--base-score', type=int, default=300, help='lowest credit score')
+    parser.add_argument('--scale-length', type=int, default=600,
+                        help='credit score range; rating bands are scaled to match')
+    args = parser.parse_args(argv)
+
+    try:
+        table = get_score_table(args.base_score, args.scale_length)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    table.export(args.output, args.bands)
+    kind = 'rating bands' if args.bands else 'scores'
+    print(f"Wrote {len(table.bands()) if args.bands else len(table.scores)} {kind} to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import metrics
+
+# One scoring thread pool per process, shared by every Streamlit session, so bursts of
+# interaction from many sessions queue behind a fixed number of workers instead of each
+# scoring on its own script thread. Scoring is numpy-bound and a single applicant takes
+# microseconds, so threads beat processes here (no pickling, one model copy).
+MAX_WORKERS = int(os.environ.get('CREDIT_RISK_SCORING_THREADS', min(4, os.cpu_count() or 1)))
+# Whole-file jobs (portfolio uploads) run on a separate, smaller pool, so a few large
+# uploads can't occupy the workers every session's interactive scoring waits on
+BATCH_WORKERS = int(os.environ.get('CREDIT_RISK_BATCH_THREADS', 2))
+
+# Default settle time for LatestRequest: submissions closer together than this coalesce
+DEBOUNCE_SECONDS = 0.05
+
+_executor = None
+_batch_executor = None
+_lock = threading.Lock()
+_counts = {'submitted': 0, 'completed': 0, 'dropped': 0, 'batch_submitted': 0, 'batch_completed': 0}
+
+
+class StaleResult(Exception):
+    # Raised from a LatestRequest future when a newer submission superseded it
+    pass
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='scoring')
+    return _executor
+
+
+def get_batch_executor():
+    global _batch_executor
+    if _batch_executor is None:
+        with _lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch-scoring')
+    return _batch_executor
+
+
+def _count(name):
+    with _lock:
+        _counts[name] += 1
+
+
+def _run(fn, args, kwargs, submitted, prefix=''):
+    metrics.stop_timer(f'{prefix}executor_wait', submitted)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _count(f'{prefix}completed')
+
+
+def submit(fn, *args, **kwargs):
+    # Run fn(*args, **kwargs) on the shared pool; returns a concurrent.futures.Future
+    _count('submitted')
+    return get_executor().submit(_run, fn, args, kwargs, metrics.start_timer())
+
+
+def submit_batch(fn, *args, **kwargs):
+    # submit(), on the whole-file pool
+    _count('batch_submitted')
+    return get_batch_executor().submit(_run, fn, args, kwargs, metrics.start_timer(), 'batch_')
+
+
+def executor_stats():
+    with _lock:
+        return {**_counts, 'max_workers': MAX_WORKERS, 'batch_workers': BATCH_WORKERS}
+
+
+metrics.register_collector('scoring_executor', executor_stats)
+
+
+class LatestRequest:
+    # A channel where only the most recent submission counts, e.g. one per what-if page.
+    # A job is handed to the pool only once debounce seconds pass without a newer
+    # submission, so the wait doesn't occupy a pool worker. Superseded jobs, whether still
+    # settling or already scored, are dropped: their futures raise StaleResult.
+
+    def __init__(self, debounce=DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        future = Future()
+        timer = threading.Timer(self.debounce, self._dispatch, (future, generation, fn, args, kwargs))
+        timer.daemon = True
+        timer.start()
+        return future
+
+    def _drop_if_stale(self, future, generation):
+        with self._lock:
+            stale = self._generation != generation
+        if stale:
+            _count('dropped')
+            future.set_exception(StaleResult())
+        return stale
+
+    def _dispatch(self, future, generation, fn, args, kwargs):
+        if self._drop_if_stale(future, generation):
+            return
+        submit(fn, *args, **kwargs).add_done_callback(
+            lambda done: self._complete(future, generation, done))
+
+    def _complete(self, future, generation, done):
+        if self._drop_if_stale(future, generation):
+            return
+        if done.exception() is not None:
+            future.set_exception(done.exception())
+        else:
+            future.set_result(done.result())
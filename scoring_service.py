@@ -0,0 +1,152 @@
+import json
+from contextlib import asynccontextmanager
+
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field, field_validator
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from model_registry import get_model_data, get_load_seconds
+from prediction_helper import (INPUT_CHOICES, INPUT_COLUMNS, INPUT_LIMITS, predict, predict_batch,
+                               validate_batch)
+from score_table import get_score_table
+
+# Batches at least this large are scored off the event loop
+THREADPOOL_MIN_ROWS = 1000
+
+
+class Application(BaseModel):
+    # One loan application; ranges mirror the input widgets in main.py
+    age: float = Field(ge=INPUT_LIMITS['age'][0], le=INPUT_LIMITS['age'][1])
+    income: float = Field(ge=INPUT_LIMITS['income'][0])
+    loan_amount: float = Field(ge=INPUT_LIMITS['loan_amount'][0])
+    loan_tenure_months: float = Field(ge=INPUT_LIMITS['loan_tenure_months'][0])
+    avg_dpd_per_delinquency: float = Field(ge=INPUT_LIMITS['avg_dpd_per_delinquency'][0])
+    delinquency_ratio: float = Field(ge=INPUT_LIMITS['delinquency_ratio'][0], le=INPUT_LIMITS['delinquency_ratio'][1])
+    credit_utilization_ratio: float = Field(ge=INPUT_LIMITS['credit_utilization_ratio'][0],
+                                            le=INPUT_LIMITS['credit_utilization_ratio'][1])
+    num_open_accounts: float = Field(ge=INPUT_LIMITS['num_open_accounts'][0], le=INPUT_LIMITS['num_open_accounts'][1])
+    residence_type: str
+    loan_purpose: str
+    loan_type: str
+
+    @field_validator('residence_type', 'loan_purpose', 'loan_type')
+    @classmethod
+    def check_choice(cls, value, info):
+        choices = INPUT_CHOICES[info.field_name]
+        if value not in choices:
+            raise ValueError(f"must be one of {choices}")
+        return value
+
+
+class Score(BaseModel):
+    probability: float
+    credit_score: int
+    rating: str
+
+
+def parse_batch(body, content_type):
+    # Accept a JSON array of applications or NDJSON (one application per line)
+    try:
+        if 'ndjson' in content_type or 'jsonlines' in content_type:
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            records = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of objects or NDJSON")
+
+    return records
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Pay the artifact load once, before the first request
+    get_model_data()
+    yield
+
+
+def create_app():
+    app = FastAPI(title="Credit Risk Scoring Service", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "model_load_seconds": get_load_seconds()}
+
+    @app.get("/metrics")
+    async def prometheus_metrics():
+        # Stage latencies are recorded when CREDIT_RISK_METRICS=1
+        return Response(metrics.render_prometheus(), media_type='text/plain; version=0.0.4')
+
+    @app.post("/score", response_model=Score)
+    async def score(application: Application):
+        probability, credit_score, rating = predict(*(getattr(application, name) for name in INPUT_COLUMNS))
+        return Score(probability=probability, credit_score=credit_score, rating=rating)
+
+    @app.post("/score/batch")
+    async def score_batch(request: Request):
+        content_type = request.headers.get('content-type', '')
+        records = parse_batch(await request.body(), content_type)
+        if not records:
+            return {"results": []}
+
+        df = pd.DataFrame.from_records(records)
+        errors = validate_batch(df)
+        if errors:
+            raise HTTPException(status_code=422, detail=[
+                {"row": row, "field": field, "msg": msg} for row, field, msg in errors
+            ])
+
+        if len(df) >= THREADPOOL_MIN_ROWS:
+            probability, credit_score, rating = await run_in_threadpool(predict_batch, df)
+        else:
+            probability, credit_score, rating = predict_batch(df)
+
+        results = pd.DataFrame({
+            'probability': probability,
+            'credit_score': credit_score,
+            'rating': rating,
+        })
+
+        # Answer NDJSON requests in kind so callers can stream the response
+        if 'ndjson' in content_type or 'jsonlines' in content_type:
+            body = results.to_json(orient='records', lines=True, double_precision=15)
+            return Response(body, media_type='application/x-ndjson')
+
+        body = '{"results": ' + results.to_json(orient='records', double_precision=15) + '}'
+        return Response(body, media_type='application/json')
+
+    # Score <-> PD lookups need no model call; callers can also fetch the whole table once
+    @app.get("/score-table")
+    async def score_table(bands: bool = False):
+        table = get_score_table()
+        rows = table.bands() if bands else table.to_frame()
+        return {"base_score": table.base_score, "scale_length": table.scale_length,
+                "rows": rows.to_dict(orient='records')}
+
+    @app.get("/score-table/cutoff")
+    async def score_cutoff(max_pd: float = Query(ge=0, le=1)):
+        # Lowest score at or above which every PD is <= max_pd (null if no score guarantees it)
+        table = get_score_table()
+        cutoff = table.cutoff_for_pd(max_pd)
+        return {"max_pd": max_pd, "credit_score": cutoff,
+                "pd_range": table.pd_range(cutoff) if cutoff is not None else None}
+
+    @app.get("/score-table/{credit_score}")
+    async def score_pd_range(credit_score: int):
+        table = get_score_table()
+        try:
+            min_pd, max_pd = table.pd_range(credit_score)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        return {"credit_score": credit_score, "min_pd": min_pd, "max_pd": max_pd}
+
+    return app
+
+
+app = create_app()
+
+# Run locally with: uvicorn scoring_service:app --port 8000
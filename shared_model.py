@@ -0,0 +1,193 @@
+import os
+import json
+import struct
+import hashlib
+import argparse
+import functools
+
+import numpy as np
+
+from model_registry import ARTIFACTS_DIR, MODEL_PATH
+
+# Flat, memory-mappable export of everything the app reads at scoring time: the model
+# coefficients, the scaler parameters and the reference distributions.
+#
+#   python shared_model.py                  # export artifacts/shared_model.bin
+#   CREDIT_RISK_SHARED_MODEL=artifacts/shared_model.bin streamlit run main.py
+#
+# Every worker started with CREDIT_RISK_SHARED_MODEL maps the same file read-only, so the
+# arrays live once in the OS page cache no matter how many workers run (see launch_workers.py).
+#
+# Layout: 8-byte magic, little-endian uint64 header length, JSON header, then each array's
+# raw C-order bytes at the 64-byte-aligned offset recorded in the header.
+SHARED_MODEL_PATH = os.path.join(ARTIFACTS_DIR, 'shared_model.bin')
+MAGIC = b'CRSMODL1'
+ALIGNMENT = 64
+
+REFERENCE_ARRAYS = ('kde_grid', 'kde_density', 'hist_edges', 'hist_counts', 'quantiles')
+
+
+class LinearModelView:
+    # Stand-in for the fitted LogisticRegression, with only the attributes scoring reads
+
+    def __init__(self, coef, intercept):
+        self.coef_ = coef
+        self.intercept_ = intercept
+
+
+class MinMaxScalerView:
+    # Stand-in for the fitted MinMaxScaler; transform() repeats its arithmetic exactly
+
+    def __init__(self, min_, scale_, feature_range, clip):
+        self.min_ = min_
+        self.scale_ = scale_
+        self.feature_range = tuple(feature_range)
+        self.clip = clip
+
+    def transform(self, X):
+        X = np.array(X, dtype=float)
+        X *= self.scale_
+        X += self.min_
+        if self.clip:
+            np.clip(X, self.feature_range[0], self.feature_range[1], out=X)
+        return X
+
+
+def aligned(n_bytes):
+    return -(-n_bytes // ALIGNMENT) * ALIGNMENT
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def export_shared_model(model_data, reference, path=SHARED_MODEL_PATH, source_sha1=None):
+    # model_data: the dict from model_data.joblib; reference: (arrays, meta) from load_reference()
+    model, scaler = model_data['model'], model_data['scaler']
+    ref_arrays, ref_meta = reference
+
+    arrays = {
+        'coef': np.asarray(model.coef_, dtype=float),
+        'intercept': np.asarray(model.intercept_, dtype=float),
+        'scaler_min': np.asarray(scaler.min_, dtype=float),
+        'scaler_scale': np.asarray(scaler.scale_, dtype=float),
+    }
+    for name in REFERENCE_ARRAYS:
+        arrays[f'reference/{name}'] = np.asarray(ref_arrays[name])
+
+    header = {
+        'meta': {
+            'features': list(model_data['features']),
+            'cols_to_scale': list(model_data['cols_to_scale']),
+            'feature_range': list(scaler.feature_range),
+            'clip': bool(getattr(scaler, 'clip', False)),
+            'source_sha1': source_sha1,
+            'reference': ref_meta,
+        },
+        'arrays': {},
+    }
+
+    relative_offsets = {}
+    offset = 0
+    for name, array in arrays.items():
+        relative_offsets[name] = offset
+        offset += aligned(array.nbytes)
+
+    # Offsets include the header length, so grow the data start until the header fits before it
+    data_start = 0
+    while True:
+        for name, array in arrays.items():
+            header['arrays'][name] = {'dtype': array.dtype.str, 'shape': list(array.shape),
+                                      'offset': data_start + relative_offsets[name]}
+        header_bytes = json.dumps(header).encode()
+        needed = aligned(len(MAGIC) + 8 + len(header_bytes))
+        if needed <= data_start:
+            break
+        data_start = needed
+    header_bytes = header_bytes.ljust(data_start - len(MAGIC) - 8)
+
+    # Write atomically: running workers keep their mapping of the old file until they restart
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+        for name, array in arrays.items():
+            f.seek(header['arrays'][name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+@functools.lru_cache(maxsize=None)
+def load_shared(path=SHARED_MODEL_PATH):
+    # (arrays, meta) as read-only views into one memory map of the file
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    if bytes(buffer[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a shared model file")
+    header_length = struct.unpack('<Q', bytes(buffer[len(MAGIC):len(MAGIC) + 8]))[0]
+    header = json.loads(bytes(buffer[len(MAGIC) + 8:len(MAGIC) + 8 + header_length]))
+
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        start = entry['offset']
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(entry['shape'])
+    return arrays, header['meta']
+
+
+def load_model_data(path=SHARED_MODEL_PATH):
+    # The same keys as model_data.joblib, backed by the shared mapping
+    arrays, meta = load_shared(path)
+    return {
+        'model': LinearModelView(arrays['coef'], arrays['intercept']),
+        'scaler': MinMaxScalerView(arrays['scaler_min'], arrays['scaler_scale'], meta['feature_range'], meta['clip']),
+        'features': meta['features'],
+        'cols_to_scale': meta['cols_to_scale'],
+    }
+
+
+def load_shared_reference(path=SHARED_MODEL_PATH):
+    # (arrays, meta) in the shape reference_data.load_reference() returns
+    arrays, meta = load_shared(path)
+    return {name: arrays[f'reference/{name}'] for name in REFERENCE_ARRAYS}, meta['reference']
+
+
+def is_current(path=SHARED_MODEL_PATH, model_path=MODEL_PATH):
+    # True if path exists and was exported from the current model and reference artifacts
+    from reference_data import REFERENCE_DIR, load_reference
+
+    if not os.path.exists(path):
+        return False
+    try:
+        _, meta = load_shared.__wrapped__(path)
+    except ValueError:
+        return False
+    reference_meta = load_reference(REFERENCE_DIR)[1]
+    return (meta['source_sha1'] == file_sha1(model_path)
+            and meta['reference'].get('fingerprint') == reference_meta.get('fingerprint'))
+
+
+def export_from_artifacts(path=SHARED_MODEL_PATH, model_path=MODEL_PATH):
+    import joblib
+    from reference_data import REFERENCE_DIR, load_reference
+
+    model_data = joblib.load(model_path)
+    return export_shared_model(model_data, load_reference(REFERENCE_DIR), path, file_sha1(model_path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the model and reference distributions to a flat, '
+                                                 'memory-mappable file')
+    parser.add_argument('--out', default=SHARED_MODEL_PATH, help='output file')
+    args = parser.parse_args()
+
+    size = export_from_artifacts(args.out)
+    print(f"Wrote {args.out} ({size / 1024:.1f} KB)")
+
+
+if __name__ == '__main__':
+    main()